@@ -3,98 +3,232 @@ Generic LLM agent for sheet manipulation.
 Supports multiple LLM providers with conversation history.
 """
 
-from typing import Dict, Any, List
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Set, Tuple
 from loguru import logger
 
 from src.config.settings import settings
-from src.sheets.sheets_client import sheets_client
+from src.sheets.async_client import async_sheets_client
 from src.sheets.models import UserContext
-from src.agent.prompts import get_system_prompt, FUNCTIONS, get_user_context_prompt
-from src.llm import get_llm_provider, ToolCall
+from src.agent.history import HistoryStore
+from src.agent.prompts import (
+    get_cached_system_prompt,
+    FUNCTIONS,
+    SUMMARY_PROMPT,
+    get_summary_prompt,
+    get_user_context_prompt,
+)
+from src.llm import get_llm_provider, TextCallback, ToolCall
+
+
+_STRUCTURE_MUTATING_TOOLS = {"open_sheet", "add_row", "update_cell", "delete_row"}
+
+_READ_SHEET_MAX_ROWS = 200
+
+
+def _tsv_cell(value: Any) -> str:
+    """Render a cell for TSV output, flattening tabs and newlines."""
+    return str(value).replace("\t", " ").replace("\n", " ")
+
+
+def _rows_to_tsv(headers: List[str], rows: List[Dict[str, Any]], first_row: int) -> str:
+    """Render records as TSV with a leading 1-indexed row number column."""
+    lines = ["\t".join(["row"] + [_tsv_cell(h) for h in headers])]
+    for row_number, record in enumerate(rows, first_row):
+        cells = [_tsv_cell(record.get(h, "")) for h in headers]
+        lines.append("\t".join([str(row_number)] + cells))
+    return "\n".join(lines)
 
 
 class Agent:
     """Agent that processes messages and executes sheet operations."""
 
     def __init__(self):
+        semantic_cache = None
+        if settings.semantic_cache and settings.semantic_cache_redis_url:
+            from src.llm.semantic_cache import RedisSemanticCache
+
+            semantic_cache = RedisSemanticCache(
+                settings.semantic_cache_redis_url,
+                threshold=settings.semantic_cache_threshold,
+                ttl=settings.semantic_cache_ttl,
+            )
+        elif settings.semantic_cache:
+            from src.llm.semantic_cache import SemanticCache
+
+            semantic_cache = SemanticCache(
+                threshold=settings.semantic_cache_threshold,
+                ttl=settings.semantic_cache_ttl,
+            )
+
         self.llm = get_llm_provider(
             provider=settings.llm_provider,
             api_key=settings.get_llm_api_key(),
             model=settings.get_llm_model(),
             base_url=settings.llm_base_url,
+            requests_per_minute=settings.llm_requests_per_minute,
+            tokens_per_minute=settings.llm_tokens_per_minute,
+            semantic_cache=semantic_cache,
         )
 
-        self.conversation_history: Dict[int, List[Dict[str, str]]] = {}
         self.max_history = 10
+        self.keep_recent = 6
+        self.history = HistoryStore(settings.history_db_path, self.max_history)
+        self._summarizing: Set[int] = set()
+        self._background_tasks: Set[asyncio.Task] = set()
+
+        self._structure_cache: Optional[Tuple[float, Optional[Dict]]] = None
+        self.structure_ttl = 30.0
 
-    def _get_history(self, user_id: int) -> List[Dict[str, str]]:
+    async def _get_history(self, user_id: int) -> List[Dict[str, str]]:
         """Get conversation history for a user."""
-        if user_id not in self.conversation_history:
-            self.conversation_history[user_id] = []
-        return self.conversation_history[user_id]
+        return await asyncio.to_thread(self.history.get, user_id)
+
+    async def _add_to_history(self, user_id: int, role: str, content: str) -> int:
+        """Add a message to user's history. Returns the user's stored message count."""
+        return await asyncio.to_thread(self.history.add, user_id, role, content)
+
+    def _schedule_summary(self, user_id: int, count: int):
+        """Summarize older messages in the background once history overflows."""
+        if count <= self.max_history or user_id in self._summarizing:
+            return
+        self._summarizing.add(user_id)
+        task = asyncio.create_task(self._summarize(user_id))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _summarize(self, user_id: int):
+        """Replace all but the newest keep_recent messages with an LLM summary."""
+        try:
+            older, through_id = await asyncio.to_thread(
+                self.history.get_older, user_id, self.keep_recent
+            )
+            if not older:
+                return
+
+            transcript = "\n".join(f"{m['role']}: {m['content']}" for m in older)
+            previous = await asyncio.to_thread(self.history.get_summary, user_id)
+            if previous:
+                transcript = f"Earlier summary: {previous}\n\n{transcript}"
 
-    def _add_to_history(self, user_id: int, role: str, content: str):
-        """Add a message to user's history."""
-        history = self._get_history(user_id)
-        history.append({"role": role, "content": content})
+            summary, _ = await self.llm.chat(
+                SUMMARY_PROMPT, [{"role": "user", "content": transcript}]
+            )
+            if not summary.strip():
+                raise ValueError("empty summary")
+
+            await asyncio.to_thread(
+                self.history.save_summary, user_id, summary.strip(), through_id
+            )
+            logger.debug(f"Summarized {len(older)} messages for user {user_id}")
+        except Exception as e:
+            logger.warning(f"Could not summarize history for user {user_id}: {e}")
+            await asyncio.to_thread(self.history.trim, user_id, self.max_history)
+        finally:
+            self._summarizing.discard(user_id)
+
+    async def _get_sheet_structure(self) -> Optional[Dict]:
+        """Get the active sheet structure, cached for `structure_ttl` seconds."""
+        if not async_sheets_client.has_active_sheet():
+            return None
+
+        now = time.monotonic()
+        if self._structure_cache:
+            fetched_at, sheet_structure = self._structure_cache
+            if now - fetched_at < self.structure_ttl:
+                return sheet_structure
+
+        sheet_structure = None
+        try:
+            sheet_structure = await async_sheets_client.get_sheet_structure()
+        except Exception as e:
+            logger.debug(f"Could not fetch sheet structure: {e}")
 
-        if len(history) > self.max_history:
-            self.conversation_history[user_id] = history[-self.max_history :]
+        self._structure_cache = (now, sheet_structure)
+        return sheet_structure
+
+    def _invalidate_structure(self):
+        """Drop the cached sheet structure after a mutating tool call."""
+        self._structure_cache = None
 
     async def process_message(
-        self, user_message: str, user_context: UserContext
+        self,
+        user_message: str,
+        user_context: UserContext,
+        on_text: Optional[TextCallback] = None,
     ) -> str:
-        """Process a user message and return a response."""
+        """
+        Process a user message and return a response.
+
+        If on_text is given, streamed LLM text deltas are passed to it as they arrive.
+        """
         try:
             user_id = user_context.user_id
 
-            self._add_to_history(user_id, "user", user_message)
+            await self._add_to_history(user_id, "user", user_message)
 
-            sheet_structure = None
-            try:
-                sheet_structure = sheets_client.get_sheet_structure()
-            except Exception as e:
-                logger.debug(f"Could not fetch sheet structure: {e}")
+            sheet_structure = await self._get_sheet_structure()
 
-            system = get_system_prompt(
+            system = get_cached_system_prompt(
                 sheet_structure=sheet_structure,
-                service_email=sheets_client.service_account_email or "",
+                service_email=async_sheets_client.service_account_email or "",
             ) + get_user_context_prompt(
                 user_context.username or user_context.get_display_name(),
                 user_context.first_name or "",
             )
 
-            messages = [{"role": "system", "content": system}]
-            messages.extend(self._get_history(user_id))
+            summary = await asyncio.to_thread(self.history.get_summary, user_id)
+            if summary:
+                system += get_summary_prompt(summary)
 
-            response_text, tool_call = await self.llm.chat(messages, FUNCTIONS)
+            messages = await self._get_history(user_id)
+
+            response_text, tool_calls = await self.llm.chat(
+                system, messages, FUNCTIONS, on_text=on_text
+            )
 
             max_iterations = 5
             iteration = 0
 
-            while tool_call and iteration < max_iterations:
+            while tool_calls and iteration < max_iterations:
                 iteration += 1
-                logger.info(
-                    f"Tool call {iteration}: {tool_call.name} with args: {tool_call.arguments}"
-                )
+                for tool_call in tool_calls:
+                    logger.info(
+                        f"Tool call {iteration}: {tool_call.name} with args: {tool_call.arguments}"
+                    )
 
-                result = await self._execute(tool_call)
+                results = await self._execute_all(tool_calls)
+                if any(tc.name in _STRUCTURE_MUTATING_TOOLS for tc in tool_calls):
+                    self._invalidate_structure()
 
-                response_text, tool_call = await self.llm.chat_with_tool_result(
-                    messages, tool_call, result, FUNCTIONS
+                response_text, tool_calls = await self.llm.chat_with_tool_result(
+                    system, messages, tool_calls, results, FUNCTIONS, on_text=on_text
                 )
 
             if iteration >= max_iterations:
                 logger.warning("Max tool iterations reached")
 
             final_response = response_text or "Done!"
-            self._add_to_history(user_id, "assistant", final_response)
+            count = await self._add_to_history(user_id, "assistant", final_response)
+            self._schedule_summary(user_id, count)
             return final_response
 
         except Exception as e:
             logger.error(f"Error processing message: {e}")
             raise
 
+    async def _execute_all(self, tool_calls: List[ToolCall]) -> List[Dict[str, Any]]:
+        """
+        Execute a batch of tool calls, returning results in call order.
+
+        Read-only calls run concurrently. A batch containing a mutating call
+        runs sequentially so row appends and deletes land in the order given.
+        """
+        if any(tc.name in _STRUCTURE_MUTATING_TOOLS for tc in tool_calls):
+            return [await self._execute(tc) for tc in tool_calls]
+        return list(await asyncio.gather(*(self._execute(tc) for tc in tool_calls)))
+
     async def _execute(self, tool_call: ToolCall) -> Dict[str, Any]:
         """Execute a tool call."""
         name = tool_call.name
@@ -104,48 +238,61 @@ class Agent:
 
         try:
             if name == "list_sheets":
-                return {"sheets": sheets_client.list_sheets()}
+                return {"sheets": await async_sheets_client.list_sheets()}
 
             elif name == "list_my_sheets":
-                return {"sheets": sheets_client.list_all_accessible_sheets()}
+                sheets = await async_sheets_client.list_all_accessible_sheets()
+                return {"sheets": sheets}
 
             elif name == "open_sheet":
                 url_or_name = args.get("url") or args.get("name")
-                sheet_info = sheets_client.open_sheet(url_or_name)
+                sheet_info = await async_sheets_client.open_sheet(url_or_name)
                 if "error" in sheet_info:
                     return sheet_info
                 return {"success": True, "sheet": sheet_info}
 
             elif name == "get_active_sheet":
-                return {"active_sheet": sheets_client.get_active_sheet_info()}
+                active_sheet = await async_sheets_client.get_active_sheet_info()
+                return {"active_sheet": active_sheet}
 
             elif name == "read_sheet":
-                result = sheets_client.read_sheet(args.get("sheet_name"))
+                result = await async_sheets_client.read_sheet(args.get("sheet_name"))
+                rows = result["rows"]
+                shown = rows[-_READ_SHEET_MAX_ROWS:]
+                first_row = len(rows) - len(shown) + 1
                 return {
                     "headers": result["headers"],
-                    "rows": result["rows"],
-                    "count": len(result["rows"]),
+                    "rows_tsv": _rows_to_tsv(result["headers"], shown, first_row),
+                    "count": len(rows),
+                    "truncated": len(shown) < len(rows),
                 }
 
             elif name == "add_row":
                 data = args.get("data") or args.get("row")
                 if data is None:
                     data = {k: v for k, v in args.items() if k != "sheet_name"}
-                result = sheets_client.add_row(data, args.get("sheet_name"))
+                result = await async_sheets_client.add_row(
+                    data, args.get("sheet_name")
+                )
                 return result if result else {"success": True}
 
             elif name == "update_cell":
-                sheets_client.update_cell(
-                    args["row"], args["column"], args["value"], args.get("sheet_name")
+                await async_sheets_client.update_cell(
+                    args["row"],
+                    args["column"],
+                    args["value"],
+                    args.get("sheet_name"),
                 )
                 return {"success": True}
 
             elif name == "delete_row":
-                sheets_client.delete_row(args["row"], args.get("sheet_name"))
+                await async_sheets_client.delete_row(
+                    args["row"], args.get("sheet_name")
+                )
                 return {"success": True}
 
             elif name == "search":
-                results = sheets_client.search(args["query"])
+                results = await async_sheets_client.search(args["query"])
                 return {"results": results, "count": len(results)}
 
             else:
@@ -0,0 +1,118 @@
+"""
+SQLite-backed conversation history.
+Keeps recent messages and a running summary per user so sessions survive restarts.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_user_id ON history (user_id, id DESC);
+CREATE TABLE IF NOT EXISTS summaries (
+    user_id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    content TEXT NOT NULL
+);
+"""
+
+
+class HistoryStore:
+    """
+    Per-user message history in SQLite.
+
+    get() returns at most max_history recent messages. Older rows stay until
+    they are folded into the user's summary or trimmed.
+    """
+
+    def __init__(self, db_path: str, max_history: int = 10):
+        self.max_history = max_history
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def get(self, user_id: int) -> List[Dict[str, str]]:
+        """Get a user's most recent messages, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content FROM history WHERE user_id = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (user_id, self.max_history),
+            ).fetchall()
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def add(self, user_id: int, role: str, content: str) -> int:
+        """Append a message. Returns the user's stored message count."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO history (user_id, ts, role, content) VALUES (?, ?, ?, ?)",
+                (user_id, time.time(), role, content),
+            )
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM history WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return count
+
+    def get_older(
+        self, user_id: int, keep: int
+    ) -> Tuple[List[Dict[str, str]], Optional[int]]:
+        """Get messages before the newest `keep`, oldest first, and the last id."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, role, content FROM history WHERE user_id = ? "
+                "ORDER BY id DESC LIMIT -1 OFFSET ?",
+                (user_id, keep),
+            ).fetchall()
+        if not rows:
+            return [], None
+        messages = [{"role": role, "content": content} for _, role, content in rows]
+        return messages[::-1], rows[0][0]
+
+    def get_summary(self, user_id: int) -> Optional[str]:
+        """Get the summary of a user's earlier conversation, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM summaries WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_summary(self, user_id: int, summary: str, through_id: int):
+        """Store a user's summary and delete the messages it covers."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (user_id, ts, content) "
+                "VALUES (?, ?, ?)",
+                (user_id, time.time(), summary),
+            )
+            self._conn.execute(
+                "DELETE FROM history WHERE user_id = ? AND id <= ?",
+                (user_id, through_id),
+            )
+
+    def trim(self, user_id: int, keep: int):
+        """Delete all but the user's newest `keep` messages."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM history WHERE user_id = ? AND id <= ("
+                "SELECT id FROM history WHERE user_id = ? "
+                "ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (user_id, user_id, keep),
+            )
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -4,40 +4,50 @@ System prompt and function definitions for the sheet agent.
 
 import json
 from datetime import date
-from typing import Optional, Dict
+from functools import lru_cache
+from typing import Optional, Dict, Tuple
 
 
 def get_system_prompt(sheet_structure: Optional[Dict] = None, service_email: str = "") -> str:
     """Build system prompt with current date and sheet structure."""
     today = date.today().isoformat()
 
-    prompt = f"""You are a helpful assistant that can read and write to Google Sheets.
+    parts = [
+        f"""You are a helpful assistant that can read and write to Google Sheets.
 Today's date is {today}.
 """
+    ]
 
     if service_email:
-        prompt += f"""
+        parts.append(
+            f"""
 SERVICE ACCOUNT EMAIL (for sharing sheets): {service_email}
 """
+        )
 
     if sheet_structure:
-        prompt += f"""
+        parts.append(
+            f"""
 ACTIVE SHEET: "{sheet_structure['title']}"
 """
-        for tab_name, tab_info in sheet_structure["tabs"].items():
-            headers = tab_info["headers"]
-            row_count = tab_info["row_count"]
-            prompt += f"""
-Tab "{tab_name}" (~{row_count} rows):
-  Columns: {json.dumps(headers)}"""
-        prompt += "\n"
+        )
+        parts.extend(
+            f"""
+Tab "{tab_name}" (~{tab_info["row_count"]} rows):
+  Columns: {json.dumps(tab_info["headers"])}"""
+            for tab_name, tab_info in sheet_structure["tabs"].items()
+        )
+        parts.append("\n")
     else:
-        prompt += """
+        parts.append(
+            """
 NO SHEET ACTIVE. If the user shares a Google Sheets URL, use open_sheet to connect.
 If open_sheet fails, tell them to share the sheet with the service account email above.
 """
+        )
 
-    prompt += f"""
+    parts.append(
+        f"""
 CRITICAL RULES:
 1. You already know the sheet structure above. Use the EXACT column names when calling add_row or update_cell.
 2. NEVER ask the user for details you can figure out yourself. Figure it out intelligently:
@@ -55,7 +65,8 @@ WORKFLOW FOR ADDING DATA:
 
 WORKFLOW FOR UPDATING/DELETING DATA:
 1. ALWAYS call search or read_sheet FIRST to find the exact row number — NEVER guess row numbers from memory
-2. The row numbers in read_sheet results are 1-indexed (row 1 = first data row after header)
+2. read_sheet returns rows as tab-separated text (rows_tsv). Its first column is the row number, 1-indexed (row 1 = first data row after header)
+   If truncated is true, only the last rows are included — use search to find older rows
 3. Match on the value the user mentions to find the correct row
 4. Then call update_cell or delete_row with the verified row number
 
@@ -67,8 +78,49 @@ WORKFLOW FOR OPENING A NEW SHEET:
 FORMATTING: Use HTML tags for formatting (this is a Telegram bot). Use <b>bold</b> for headers/emphasis, <i>italic</i> for secondary emphasis, <code>monospace</code> for values/emails/IDs. Use dashes (-) for lists. Do NOT use markdown (no **, no *, no `, no #).
 
 Available functions: open_sheet, get_active_sheet, list_my_sheets, list_sheets, read_sheet, add_row, update_cell, delete_row, search"""
+    )
 
-    return prompt
+    return "".join(parts)
+
+
+def _structure_key(sheet_structure: Optional[Dict]) -> Optional[Tuple]:
+    """Reduce a sheet structure to a hashable key."""
+    if not sheet_structure:
+        return None
+    return (
+        sheet_structure["title"],
+        tuple(
+            (tab_name, tuple(tab_info["headers"]), tab_info["row_count"])
+            for tab_name, tab_info in sheet_structure["tabs"].items()
+        ),
+    )
+
+
+@lru_cache(maxsize=32)
+def _build_system_prompt(
+    structure_key: Optional[Tuple], service_email: str, today: str
+) -> str:
+    """Build the system prompt for a structure key. `today` only keys the cache."""
+    sheet_structure = None
+    if structure_key:
+        title, tabs = structure_key
+        sheet_structure = {
+            "title": title,
+            "tabs": {
+                tab_name: {"headers": list(headers), "row_count": row_count}
+                for tab_name, headers, row_count in tabs
+            },
+        }
+    return get_system_prompt(sheet_structure, service_email)
+
+
+def get_cached_system_prompt(
+    sheet_structure: Optional[Dict] = None, service_email: str = ""
+) -> str:
+    """Return the system prompt, reused while structure, email and date match."""
+    return _build_system_prompt(
+        _structure_key(sheet_structure), service_email, date.today().isoformat()
+    )
 
 
 FUNCTIONS = [
@@ -194,6 +246,17 @@ FUNCTIONS = [
 ]
 
 
+SUMMARY_PROMPT = """Summarize this conversation between a user and a Google Sheets assistant in a few sentences.
+Keep sheet and tab names, row numbers, column names and values the user may refer back to.
+Reply with the summary only."""
+
+
+def get_summary_prompt(summary: str) -> str:
+    """Add the summary of earlier conversation to prompt."""
+    return f"\n\nEarlier conversation summary: {summary}"
+
+
+@lru_cache(maxsize=256)
 def get_user_context_prompt(username: str, first_name: str) -> str:
     """Add user context to prompt."""
     return f"\n\nUser: {first_name or username}"
@@ -2,44 +2,130 @@
 Telegram bot command and message handlers.
 """
 
+import asyncio
 import re
+import time
+from typing import Optional
 
 from telegram import Update
 from telegram.constants import ParseMode
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 from loguru import logger
 
 from src.config.settings import settings
 from src.agent.agent import agent
-from src.sheets.sheets_client import sheets_client
+from src.llm import TextCallback
+from src.sheets.sheets_client import get_sheets_client
 from src.sheets.models import UserContext
 from src.utils.errors import LLMConnectionError, SheetsConnectionError
+from src.utils.rate_limiter import TokenBucket
 
 
 _ALLOWED_TAGS = {"b", "i", "code", "pre", "u", "s", "a"}
 
+_ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+_TAG_RE = re.compile(
+    r"&lt;(/?)(" + "|".join(sorted(_ALLOWED_TAGS)) + r")((?:\s[^&]*?)?)&gt;",
+    re.IGNORECASE,
+)
+
+
+def _restore_tag(match: re.Match) -> str:
+    """Turn an escaped allowed tag back into markup."""
+    closing, tag, attrs = match.groups()
+    if closing and attrs:
+        return match.group(0)
+    return f"<{closing}{tag}{attrs}>"
+
 
 def sanitize_html(text: str) -> str:
     """Escape HTML but preserve allowed Telegram tags."""
+    if "<" not in text and ">" not in text and "&" not in text:
+        return text
 
-    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    text = text.translate(_ESCAPE_TABLE)
+    if "&lt;" not in text:
+        return text
+    return _TAG_RE.sub(_restore_tag, text)
 
-    for tag in _ALLOWED_TAGS:
 
-        text = re.sub(
-            rf"&lt;({tag})(\s[^&]*?)?&gt;",
-            rf"<\1\2>",
-            text,
-            flags=re.IGNORECASE,
-        )
+_STREAM_EDIT_INTERVAL = 0.5
+_TYPING_INTERVAL = 4.0
 
-        text = re.sub(
-            rf"&lt;/({tag})&gt;",
-            rf"</\1>",
-            text,
-            flags=re.IGNORECASE,
-        )
-    return text
+_agent_semaphore = asyncio.Semaphore(settings.max_concurrent_agent_calls)
+_agent_rate_limiter = TokenBucket(
+    settings.agent_rate_limit, capacity=settings.max_concurrent_agent_calls
+)
+
+
+async def _run_agent(
+    message_text: str,
+    user_context: UserContext,
+    on_text: Optional[TextCallback] = None,
+) -> str:
+    """Run the agent under the global concurrency cap and rate limit."""
+    async with _agent_semaphore:
+        await _agent_rate_limiter.acquire()
+        return await agent.process_message(message_text, user_context, on_text=on_text)
+
+
+async def _keep_typing(chat) -> None:
+    """Show the typing indicator until cancelled. Telegram clears it after ~5s."""
+    while True:
+        try:
+            await chat.send_action("typing")
+        except Exception as e:
+            logger.debug(f"Could not send typing action: {e}")
+        await asyncio.sleep(_TYPING_INTERVAL)
+
+
+def _is_not_modified(error: Exception) -> bool:
+    """Check whether Telegram rejected an edit because the text is unchanged."""
+    return isinstance(error, BadRequest) and "not modified" in str(error).lower()
+
+
+async def _reply_streaming(
+    update: Update, message_text: str, user_context: UserContext
+) -> None:
+    """Send a placeholder reply and edit it as the agent streams its response."""
+    placeholder = await update.message.reply_text("…")
+    buffer = []
+    last_edit = time.monotonic()
+    sent = ""
+
+    async def on_text(delta: str):
+        nonlocal last_edit, sent
+        buffer.append(delta)
+        now = time.monotonic()
+        if now - last_edit < _STREAM_EDIT_INTERVAL:
+            return
+        last_edit = now
+        text = "".join(buffer).strip()
+        if not text or text == sent:
+            return
+        try:
+            await placeholder.edit_text(text)
+            sent = text
+        except Exception as e:
+            logger.debug(f"Skipped streaming edit: {e}")
+
+    response = await _run_agent(message_text, user_context, on_text=on_text)
+
+    html = sanitize_html(response)
+    if "<" not in html and html.strip() == sent:
+        return
+    try:
+        await placeholder.edit_text(html, parse_mode=ParseMode.HTML)
+    except Exception as e:
+        if _is_not_modified(e):
+            return
+        try:
+            await placeholder.edit_text(response)
+        except BadRequest as e:
+            if not _is_not_modified(e):
+                raise
 
 
 def is_user_allowed(user) -> bool:
@@ -48,7 +134,7 @@ def is_user_allowed(user) -> bool:
     if not allowed:
         return True
 
-    return str(user.id) in allowed or (user.username and user.username in allowed)
+    return str(user.id) in allowed or bool(user.username and user.username in allowed)
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -61,7 +147,9 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Access denied.")
         return
 
-    service_email = sheets_client.service_account_email or "the service account"
+    service_email = (
+        get_sheets_client().service_account_email or "the service account"
+    )
 
     welcome_message = f"""<b>Welcome to OpenSloth!</b>
 
@@ -100,7 +188,9 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Access denied.")
         return
 
-    service_email = sheets_client.service_account_email or "the service account"
+    service_email = (
+        get_sheets_client().service_account_email or "the service account"
+    )
 
     help_message = f"""<b>OpenSloth Help</b>
 
@@ -168,16 +258,21 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             last_name=user.last_name,
         )
 
-        await update.message.chat.send_action("typing")
-
-        response = await agent.process_message(message_text, user_context)
-
+        typing_task = asyncio.create_task(_keep_typing(update.message.chat))
         try:
-            await update.message.reply_text(
-                sanitize_html(response), parse_mode=ParseMode.HTML
-            )
-        except Exception:
-            await update.message.reply_text(response)
+            if settings.stream_responses:
+                await _reply_streaming(update, message_text, user_context)
+            else:
+                response = await _run_agent(message_text, user_context)
+
+                try:
+                    await update.message.reply_text(
+                        sanitize_html(response), parse_mode=ParseMode.HTML
+                    )
+                except Exception:
+                    await update.message.reply_text(response)
+        finally:
+            typing_task.cancel()
 
         logger.info(f"Sent response to user {user.id}")
 
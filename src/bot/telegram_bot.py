@@ -3,12 +3,18 @@ Telegram bot implementation with polling.
 """
 
 import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from telegram.ext import Application, CommandHandler, MessageHandler, filters
 from loguru import logger
 
 from src.config.settings import settings
+from src.agent.agent import agent
+from src.llm import close_llm_providers
 from src.bot.handlers import start_command, help_command, handle_message, error_handler
 
+_EXECUTOR_WORKERS = 32
+
 
 class TelegramBot:
     """Telegram bot with polling support."""
@@ -28,10 +34,35 @@ class TelegramBot:
         self.application.add_error_handler(error_handler)
         logger.info("Registered all bot handlers")
 
+    def _use_uvloop(self):
+        """Switch asyncio to uvloop when it is installed (not available on Windows)."""
+        if sys.platform == "win32":
+            return
+        try:
+            import uvloop
+        except ImportError:
+            logger.debug("uvloop not installed, using the default asyncio event loop")
+            return
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.info("Using uvloop event loop")
+
+    async def _configure_loop(self, application: Application):
+        """Give worker-thread offloads (Sheets, history) a larger default pool."""
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=_EXECUTOR_WORKERS)
+        )
+
     def start(self):
         """Start the bot with polling."""
         try:
-            self.application = Application.builder().token(self.token).build()
+            self._use_uvloop()
+            self.application = (
+                Application.builder()
+                .token(self.token)
+                .post_init(self._configure_loop)
+                .post_shutdown(self.stop)
+                .build()
+            )
             self.setup_handlers()
 
             logger.info("Bot is now running and polling for messages")
@@ -43,5 +74,11 @@ class TelegramBot:
             logger.error(f"Error running bot: {e}")
             raise
 
+    async def stop(self, application: Application):
+        """Release LLM connections and the history store after polling stops."""
+        await close_llm_providers()
+        agent.history.close()
+        logger.info("Closed LLM provider connections and history store")
+
 
 telegram_bot = TelegramBot()
@@ -2,7 +2,8 @@
 Configuration management using Pydantic Settings.
 """
 
-from typing import List, Optional
+from functools import cached_property
+from typing import FrozenSet, Optional
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 
@@ -17,6 +18,18 @@ class Settings(BaseSettings):
     llm_api_key: str = Field("", env="LLM_API_KEY")
     llm_model: str = Field("gpt-4-turbo", env="LLM_MODEL")
     llm_base_url: Optional[str] = Field(None, env="LLM_BASE_URL")
+    stream_responses: bool = Field(False, env="STREAM_RESPONSES")
+    llm_requests_per_minute: float = Field(0.0, env="LLM_REQUESTS_PER_MINUTE")
+    llm_tokens_per_minute: float = Field(0.0, env="LLM_TOKENS_PER_MINUTE")
+    max_concurrent_agent_calls: int = Field(10, env="MAX_CONCURRENT_AGENT_CALLS")
+    agent_rate_limit: float = Field(5.0, env="AGENT_RATE_LIMIT")
+
+    semantic_cache: bool = Field(False, env="SEMANTIC_CACHE")
+    semantic_cache_threshold: float = Field(0.92, env="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_ttl: float = Field(3600.0, env="SEMANTIC_CACHE_TTL")
+    semantic_cache_redis_url: Optional[str] = Field(
+        None, env="SEMANTIC_CACHE_REDIS_URL"
+    )
 
     openai_api_key: Optional[str] = Field(None, env="OPENAI_API_KEY")
     openai_model: Optional[str] = Field(None, env="OPENAI_MODEL")
@@ -28,18 +41,20 @@ class Settings(BaseSettings):
 
     allowed_users_raw: str = Field("", env="ALLOWED_USERS")
 
+    history_db_path: str = Field("data/history.db", env="HISTORY_DB_PATH")
+
     log_level: str = Field("INFO", env="LOG_LEVEL")
 
     class Config:
         env_file = ".env"
         case_sensitive = False
 
-    @property
-    def allowed_users(self) -> List[str]:
-        """Parse comma-separated allowed users list."""
-        if not self.allowed_users_raw.strip():
-            return []
-        return [u.strip() for u in self.allowed_users_raw.split(",") if u.strip()]
+    @cached_property
+    def allowed_users(self) -> FrozenSet[str]:
+        """Parse comma-separated allowed users list once."""
+        return frozenset(
+            u.strip() for u in self.allowed_users_raw.split(",") if u.strip()
+        )
 
     def get_llm_api_key(self) -> str:
         """Get API key, with fallback to legacy OPENAI_API_KEY."""
@@ -3,7 +3,13 @@ LLM provider abstraction layer.
 Supports multiple LLM providers: OpenAI, Anthropic, Google, Ollama.
 """
 
-from src.llm.base import LLMProvider, ToolCall
-from src.llm.factory import get_llm_provider
+from src.llm.base import LLMProvider, TextCallback, ToolCall
+from src.llm.factory import close_llm_providers, get_llm_provider
 
-__all__ = ['LLMProvider', 'ToolCall', 'get_llm_provider']
+__all__ = [
+    'LLMProvider',
+    'TextCallback',
+    'ToolCall',
+    'close_llm_providers',
+    'get_llm_provider',
+]
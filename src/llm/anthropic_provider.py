@@ -2,30 +2,53 @@
 Anthropic (Claude) LLM provider implementation.
 """
 
-import json
+import importlib.util
 from typing import List, Dict, Any, Optional
 from loguru import logger
 
-from src.llm.base import LLMProvider, ToolCall
+from src.llm.base import LLMProvider, TextCallback, ToolCall
+from src.utils.serialization import dumps
 
-try:
-    import anthropic
+ANTHROPIC_AVAILABLE = importlib.util.find_spec("anthropic") is not None
 
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    ANTHROPIC_AVAILABLE = False
+_EPHEMERAL_CACHE = {"type": "ephemeral"}
 
 
 class AnthropicProvider(LLMProvider):
     """Anthropic Claude API provider."""
 
-    def __init__(self, api_key: str, model: str, base_url: Optional[str] = None):
-        super().__init__(api_key, model, base_url)
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        max_concurrent_requests: int = 20,
+        requests_per_minute: float = 0.0,
+        tokens_per_minute: float = 0.0,
+    ):
+        super().__init__(
+            api_key,
+            model,
+            base_url,
+            max_concurrent_requests,
+            requests_per_minute,
+            tokens_per_minute,
+        )
         if not ANTHROPIC_AVAILABLE:
             raise ImportError(
                 "anthropic package not installed. Run: pip install anthropic"
             )
-        self.client = anthropic.AsyncAnthropic(api_key=api_key)
+        import anthropic
+
+        self.http_client = anthropic.DefaultAsyncHttpxClient(http2=True)
+        self.client = anthropic.AsyncAnthropic(
+            api_key=api_key, http_client=self.http_client
+        )
+        self._tools_cache: Dict[int, tuple[list, List[Dict[str, Any]]]] = {}
+
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        await self.http_client.aclose()
 
     def _convert_to_anthropic_tools(
         self, tools: List[Dict[str, Any]]
@@ -44,115 +67,123 @@ class AnthropicProvider(LLMProvider):
             )
         return anthropic_tools
 
-    def _extract_system_message(
-        self, messages: List[Dict[str, Any]]
-    ) -> tuple[str, List[Dict[str, Any]]]:
-        """Extract system message from messages list."""
-        system = ""
-        other_messages = []
-        for msg in messages:
-            if msg["role"] == "system":
-                system = msg["content"]
-            else:
-                other_messages.append(msg)
-        return system, other_messages
+    def _get_tools(self, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Convert tools once per tools list, with a cache breakpoint on the last one.
+
+        Keyed by id(); the original list is kept alongside so the id cannot be
+        reused by another object while cached.
+        """
+        cached = self._tools_cache.get(id(tools))
+        if cached is not None and cached[0] is tools:
+            return cached[1]
+
+        anthropic_tools = self._convert_to_anthropic_tools(tools)
+        anthropic_tools[-1] = {
+            **anthropic_tools[-1],
+            "cache_control": _EPHEMERAL_CACHE,
+        }
+        self._tools_cache[id(tools)] = (tools, anthropic_tools)
+        return anthropic_tools
 
-    async def chat(
+    def _build_request(
         self,
+        system: str,
         messages: List[Dict[str, Any]],
         tools: Optional[List[Dict[str, Any]]] = None,
-    ) -> tuple[str, Optional[ToolCall]]:
-        """Send chat to Claude."""
-        system, chat_messages = self._extract_system_message(messages)
-
-        kwargs = {"model": self.model, "max_tokens": 4096, "messages": chat_messages}
+    ) -> Dict[str, Any]:
+        """Build messages.create kwargs with cache breakpoints on the static prefix."""
+        kwargs = {"model": self.model, "max_tokens": 4096, "messages": messages}
 
         if system:
-            kwargs["system"] = system
+            kwargs["system"] = [
+                {"type": "text", "text": system, "cache_control": _EPHEMERAL_CACHE}
+            ]
 
         if tools:
-            kwargs["tools"] = self._convert_to_anthropic_tools(tools)
+            kwargs["tools"] = self._get_tools(tools)
 
-        response = await self.client.messages.create(**kwargs)
+        return kwargs
 
-        for block in response.content:
-            if block.type == "tool_use":
-                tool_call = ToolCall(name=block.name, arguments=block.input)
+    async def _send(self, kwargs: Dict[str, Any], on_text: Optional[TextCallback]):
+        """Create a message, streaming text deltas to on_text when given."""
+        await self._throttle(kwargs.get("system"), kwargs["messages"])
+        if on_text is None:
+            return await self.client.messages.create(**kwargs)
 
-                text = ""
-                for b in response.content:
-                    if b.type == "text":
-                        text = b.text
-                        break
-                return text, tool_call
+        async with self.client.messages.stream(**kwargs) as stream:
+            async for delta in stream.text_stream:
+                await on_text(delta)
+            return await stream.get_final_message()
 
+    def _parse_response(self, response) -> tuple[str, List[ToolCall]]:
+        """Extract the first text block and all tool_use blocks in one pass."""
         text = ""
+        tool_calls = []
         for block in response.content:
-            if block.type == "text":
+            if block.type == "tool_use":
+                tool_calls.append(
+                    ToolCall(name=block.name, arguments=block.input, id=block.id)
+                )
+            elif block.type == "text" and not text:
                 text = block.text
-                break
+        return text, tool_calls
+
+    async def chat(
+        self,
+        system: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
+        """Send chat to Claude."""
+        kwargs = self._build_request(system, messages, tools)
 
-        return text, None
+        response = await self._send(kwargs, on_text)
+        return self._parse_response(response)
 
     async def chat_with_tool_result(
         self,
+        system: str,
         messages: List[Dict[str, Any]],
-        tool_call: ToolCall,
-        tool_result: Dict[str, Any],
+        tool_calls: List[ToolCall],
+        tool_results: List[Dict[str, Any]],
         tools: Optional[List[Dict[str, Any]]] = None,
-    ) -> tuple[str, Optional[ToolCall]]:
-        """Continue chat with tool result. Returns (text, optional_next_tool_call)."""
-        system, chat_messages = self._extract_system_message(messages)
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
+        """Continue chat with tool results. Returns (text, next_tool_calls)."""
+        tool_ids = [tc.id or f"tool_{i}" for i, tc in enumerate(tool_calls, 1)]
 
-        chat_messages.append(
+        messages.append(
             {
                 "role": "assistant",
                 "content": [
                     {
                         "type": "tool_use",
-                        "id": "tool_1",
-                        "name": tool_call.name,
-                        "input": tool_call.arguments,
+                        "id": tool_id,
+                        "name": tc.name,
+                        "input": tc.arguments,
                     }
+                    for tool_id, tc in zip(tool_ids, tool_calls)
                 ],
             }
         )
 
-        chat_messages.append(
+        messages.append(
             {
                 "role": "user",
                 "content": [
                     {
                         "type": "tool_result",
-                        "tool_use_id": "tool_1",
-                        "content": json.dumps(tool_result),
+                        "tool_use_id": tool_id,
+                        "content": dumps(result),
                     }
+                    for tool_id, result in zip(tool_ids, tool_results)
                 ],
             }
         )
 
-        kwargs = {"model": self.model, "max_tokens": 4096, "messages": chat_messages}
-
-        if system:
-            kwargs["system"] = system
-
-        if tools:
-            kwargs["tools"] = self._convert_to_anthropic_tools(tools)
-
-        response = await self.client.messages.create(**kwargs)
-
-        for block in response.content:
-            if block.type == "tool_use":
-                next_tool_call = ToolCall(name=block.name, arguments=block.input)
-                text = ""
-                for b in response.content:
-                    if b.type == "text":
-                        text = b.text
-                        break
-                return text, next_tool_call
-
-        for block in response.content:
-            if block.type == "text":
-                return block.text, None
+        kwargs = self._build_request(system, messages, tools)
 
-        return "", None
+        response = await self._send(kwargs, on_text)
+        return self._parse_response(response)
@@ -2,9 +2,15 @@
 Abstract base class for LLM providers.
 """
 
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Union
+
+from src.utils.rate_limiter import TokenBucket
+
+
+TextCallback = Callable[[str], Awaitable[None]]
 
 
 @dataclass
@@ -13,6 +19,7 @@ class ToolCall:
 
     name: str
     arguments: Dict[str, Any]
+    id: Optional[str] = None
 
 
 @dataclass
@@ -28,52 +35,208 @@ class Message:
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
 
-    def __init__(self, api_key: str, model: str, base_url: Optional[str] = None):
+    supports_batch = False
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        max_concurrent_requests: int = 20,
+        requests_per_minute: float = 0.0,
+        tokens_per_minute: float = 0.0,
+    ):
         self.api_key = api_key
         self.model = model
         self.base_url = base_url
+        self.max_concurrent_requests = max_concurrent_requests
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_bucket = TokenBucket(
+            requests_per_minute / 60, max(1.0, requests_per_minute / 6)
+        )
+        self._token_bucket = TokenBucket(
+            tokens_per_minute / 60, max(1.0, tokens_per_minute / 6)
+        )
+
+    async def _throttle(self, *payload: Any):
+        """
+        Wait for request and token budget before an API call. 0 limits disable it.
+
+        Input tokens are estimated at four characters per token of the payload.
+        Buckets hold ten seconds of budget so short bursts are not delayed.
+        """
+        await self._request_bucket.acquire()
+        if self.tokens_per_minute > 0:
+            estimated = sum(len(str(part)) for part in payload) / 4
+            await self._token_bucket.acquire(max(1.0, estimated))
 
     @abstractmethod
     async def chat(
         self,
+        system: str,
         messages: List[Dict[str, Any]],
         tools: Optional[List[Dict[str, Any]]] = None,
-    ) -> tuple[str, Optional[ToolCall]]:
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
         """
         Send chat messages to the LLM.
 
         Args:
-            messages: List of message dicts with 'role' and 'content'
+            system: System prompt, empty for none
+            messages: List of message dicts with 'role' and 'content', without
+                the system prompt
             tools: Optional list of tool/function definitions
+            on_text: Optional callback awaited with each streamed text delta.
+                When given, the response is streamed.
 
         Returns:
-            Tuple of (response_text, tool_call_or_none)
+            Tuple of (response_text, tool_calls), tool_calls empty if none
         """
         pass
 
     @abstractmethod
     async def chat_with_tool_result(
         self,
+        system: str,
         messages: List[Dict[str, Any]],
-        tool_call: ToolCall,
-        tool_result: Dict[str, Any],
+        tool_calls: List[ToolCall],
+        tool_results: List[Dict[str, Any]],
         tools: Optional[List[Dict[str, Any]]] = None,
-    ) -> tuple[str, Optional["ToolCall"]]:
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
         """
-        Continue chat after a tool call with the result.
+        Continue chat after one or more tool calls with their results.
+
+        Providers append the tool call and result messages to `messages` in
+        place, so passing the same list through a tool loop keeps every round
+        without re-deriving it.
 
         Args:
-            messages: Original messages
-            tool_call: The tool call that was made
-            tool_result: Result from executing the tool
+            system: System prompt, empty for none
+            messages: Conversation so far, without the system prompt
+            tool_calls: The tool calls that were made
+            tool_results: Results from executing the tools, in the same order
             tools: Tool definitions
+            on_text: Optional callback awaited with each streamed text delta
 
         Returns:
-            Tuple of (response_text, next_tool_call_or_none)
+            Tuple of (response_text, next_tool_calls)
         """
         pass
 
+    async def chat_many(
+        self,
+        system: str,
+        batch: List[List[Dict[str, Any]]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        max_concurrent: Optional[int] = None,
+    ) -> List[Union[tuple[str, List[ToolCall]], BaseException]]:
+        """
+        Run chat() for several independent conversations concurrently.
+
+        At most max_concurrent requests (default max_concurrent_requests) are
+        in flight at once. Results come back in batch order; a failed request
+        yields its exception instead of raising.
+        """
+        semaphore = asyncio.Semaphore(max_concurrent or self.max_concurrent_requests)
+
+        async def run(messages: List[Dict[str, Any]]) -> tuple[str, List[ToolCall]]:
+            async with semaphore:
+                return await self.chat(system, messages, tools)
+
+        return await asyncio.gather(
+            *(run(messages) for messages in batch), return_exceptions=True
+        )
+
+    async def submit_batch(self, system: str, prompts: List[str]) -> str:
+        """
+        Submit single-turn prompts as an asynchronous batch job.
+
+        Batch jobs trade latency (up to a day) for cheaper tokens, for bulk
+        work nobody is waiting on. Only available when supports_batch is
+        set; other providers raise NotImplementedError.
+
+        Args:
+            system: System prompt shared by every request, empty for none
+            prompts: User messages, one request each
+
+        Returns:
+            Job ID to pass to poll_batch
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batch jobs")
+
+    async def poll_batch(self, job_id: str) -> Optional[List[Optional[str]]]:
+        """
+        Check a batch job submitted with submit_batch.
+
+        Returns:
+            None while the job is running, otherwise the response text for each
+            prompt in submission order, with None for requests that failed
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batch jobs")
+
+    async def aclose(self):
+        """Release network resources held by the provider. No-op by default."""
+        pass
+
     @staticmethod
     def convert_tools_to_functions(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Convert generic tool format to OpenAI functions format."""
         return tools
+
+
+class LLMProviderWrapper(LLMProvider):
+    """
+    Provider that forwards every call to a wrapped provider.
+
+    Wrappers such as request coalescing or response caching subclass this
+    and override only the calls they change.
+    """
+
+    def __init__(self, inner: LLMProvider):
+        super().__init__(
+            inner.api_key, inner.model, inner.base_url, inner.max_concurrent_requests
+        )
+        self.inner = inner
+
+    @property
+    def supports_batch(self) -> bool:
+        """Whether the wrapped provider supports batch jobs."""
+        return self.inner.supports_batch
+
+    async def chat(
+        self,
+        system: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
+        """Send chat on the wrapped provider."""
+        return await self.inner.chat(system, messages, tools, on_text=on_text)
+
+    async def chat_with_tool_result(
+        self,
+        system: str,
+        messages: List[Dict[str, Any]],
+        tool_calls: List[ToolCall],
+        tool_results: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
+        """Continue chat with tool results on the wrapped provider."""
+        return await self.inner.chat_with_tool_result(
+            system, messages, tool_calls, tool_results, tools, on_text=on_text
+        )
+
+    async def submit_batch(self, system: str, prompts: List[str]) -> str:
+        """Submit a batch job on the wrapped provider."""
+        return await self.inner.submit_batch(system, prompts)
+
+    async def poll_batch(self, job_id: str) -> Optional[List[Optional[str]]]:
+        """Check a batch job on the wrapped provider."""
+        return await self.inner.poll_batch(job_id)
+
+    async def aclose(self):
+        """Close the wrapped provider."""
+        await self.inner.aclose()
@@ -0,0 +1,63 @@
+"""
+In-flight de-duplication of identical LLM requests.
+"""
+
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from src.llm.base import LLMProvider, LLMProviderWrapper, TextCallback, ToolCall
+from src.utils.serialization import dumps
+
+
+class CoalescingLLMProvider(LLMProviderWrapper):
+    """
+    Provider wrapper that shares one chat() call among identical concurrent requests.
+
+    A request whose model, system prompt, messages and tools match one already
+    in flight awaits that request's result instead of calling the API again.
+    Followers that asked for streaming get the full text once it is done.
+    chat_with_tool_result() appends to the caller's messages, so it is never
+    coalesced.
+    """
+
+    def __init__(self, inner: LLMProvider):
+        super().__init__(inner)
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def _key(
+        self,
+        system: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]],
+    ) -> str:
+        """Hash everything that determines the response."""
+        payload = dumps([self.model, system, messages, tools or []])
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    async def chat(
+        self,
+        system: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
+        """Send chat, joining an identical request that is already in flight."""
+        key = self._key(system, messages, tools)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            logger.debug("Joining in-flight LLM request")
+            text, tool_calls = await asyncio.shield(task)
+            if on_text is not None and text:
+                await on_text(text)
+            return text, list(tool_calls)
+
+        task = asyncio.ensure_future(
+            self.inner.chat(system, messages, tools, on_text=on_text)
+        )
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
@@ -2,26 +2,76 @@
 Factory function for creating LLM providers.
 """
 
-from typing import Optional
+import hashlib
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 from loguru import logger
 
 from src.llm.base import LLMProvider
+from src.llm.coalescing import CoalescingLLMProvider
+
+if TYPE_CHECKING:
+    from src.llm.semantic_cache import SemanticCache
+
+
+_providers: Dict[Tuple[str, str, str, Optional[str], float, float], LLMProvider] = {}
+
+
+def _create_provider(
+    provider: str,
+    api_key: str,
+    model: str,
+    base_url: Optional[str] = None,
+    **limits: float,
+) -> LLMProvider:
+    """Instantiate the provider class for a lowercased provider name."""
+    if provider == "openai":
+        from src.llm.openai_provider import OpenAIProvider
+        logger.info(f"Using OpenAI provider with model: {model}")
+        return OpenAIProvider(api_key, model, base_url, **limits)
+
+    elif provider == "anthropic":
+        from src.llm.anthropic_provider import AnthropicProvider
+        logger.info(f"Using Anthropic provider with model: {model}")
+        return AnthropicProvider(api_key, model, base_url, **limits)
+
+    elif provider == "google":
+        from src.llm.google_provider import GoogleProvider
+        logger.info(f"Using Google provider with model: {model}")
+        return GoogleProvider(api_key, model, base_url, **limits)
+
+    elif provider == "ollama":
+        from src.llm.ollama_provider import OllamaProvider
+        logger.info(f"Using Ollama provider with model: {model}")
+        return OllamaProvider(api_key, model, base_url, **limits)
+
+    else:
+        raise ValueError(f"Unsupported LLM provider: {provider}. Use: openai, anthropic, google, or ollama")
 
 
 def get_llm_provider(
     provider: str,
     api_key: str,
     model: str,
-    base_url: Optional[str] = None
+    base_url: Optional[str] = None,
+    semantic_cache: Optional["SemanticCache"] = None,
+    requests_per_minute: float = 0.0,
+    tokens_per_minute: float = 0.0,
 ) -> LLMProvider:
     """
     Create and return an LLM provider instance.
 
+    Instances are reused for the same provider, API key, model, base URL and
+    rate limits, so every caller shares one client, its connection pool and
+    its rate limit budget, and identical concurrent requests are sent once.
+
     Args:
         provider: Provider name (openai, anthropic, google, ollama)
         api_key: API key for the provider
         model: Model name
         base_url: Optional custom endpoint URL
+        semantic_cache: Optional SemanticCache to answer repeated questions from
+        requests_per_minute: Client-side request rate limit, 0 for none
+        tokens_per_minute: Client-side input token rate limit, 0 for none
 
     Returns:
         LLMProvider instance
@@ -31,25 +81,39 @@ def get_llm_provider(
     """
     provider = provider.lower()
 
-    if provider == "openai":
-        from src.llm.openai_provider import OpenAIProvider
-        logger.info(f"Using OpenAI provider with model: {model}")
-        return OpenAIProvider(api_key, model, base_url)
+    key = (
+        provider,
+        hashlib.sha256(api_key.encode()).hexdigest(),
+        model,
+        base_url,
+        requests_per_minute,
+        tokens_per_minute,
+    )
+    instance = _providers.get(key)
+    if instance is None:
+        instance = CoalescingLLMProvider(
+            _create_provider(
+                provider,
+                api_key,
+                model,
+                base_url,
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute,
+            )
+        )
+        _providers[key] = instance
 
-    elif provider == "anthropic":
-        from src.llm.anthropic_provider import AnthropicProvider
-        logger.info(f"Using Anthropic provider with model: {model}")
-        return AnthropicProvider(api_key, model, base_url)
+    if semantic_cache is not None:
+        from src.llm.semantic_cache import CachedLLMProvider
+        logger.info("Semantic response cache enabled")
+        return CachedLLMProvider(instance, semantic_cache)
 
-    elif provider == "google":
-        from src.llm.google_provider import GoogleProvider
-        logger.info(f"Using Google provider with model: {model}")
-        return GoogleProvider(api_key, model, base_url)
+    return instance
 
-    elif provider == "ollama":
-        from src.llm.ollama_provider import OllamaProvider
-        logger.info(f"Using Ollama provider with model: {model}")
-        return OllamaProvider(api_key, model, base_url)
 
-    else:
-        raise ValueError(f"Unsupported LLM provider: {provider}. Use: openai, anthropic, google, or ollama")
+async def close_llm_providers():
+    """Close every cached provider's connections and forget the instances."""
+    providers = list(_providers.values())
+    _providers.clear()
+    for instance in providers:
+        await instance.aclose()
@@ -2,31 +2,63 @@
 Google Gemini LLM provider implementation.
 """
 
-import json
+import asyncio
+import datetime
+import hashlib
+import importlib.util
+import time
 from typing import List, Dict, Any, Optional
 from loguru import logger
 
-from src.llm.base import LLMProvider, ToolCall
+from src.llm.base import LLMProvider, TextCallback, ToolCall
+from src.utils.serialization import dumps
 
-try:
-    import google.generativeai as genai
 
-    GOOGLE_AVAILABLE = True
-except ImportError:
-    GOOGLE_AVAILABLE = False
+def _find_genai() -> bool:
+    """Check whether google-generativeai is installed without importing it."""
+    try:
+        return importlib.util.find_spec("google.generativeai") is not None
+    except ModuleNotFoundError:
+        return False
+
+
+GOOGLE_AVAILABLE = _find_genai()
+
+_MIN_CACHE_TOKENS = 32768
 
 
 class GoogleProvider(LLMProvider):
     """Google Gemini API provider."""
 
-    def __init__(self, api_key: str, model: str, base_url: Optional[str] = None):
-        super().__init__(api_key, model, base_url)
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        max_concurrent_requests: int = 20,
+        requests_per_minute: float = 0.0,
+        tokens_per_minute: float = 0.0,
+    ):
+        super().__init__(
+            api_key,
+            model,
+            base_url,
+            max_concurrent_requests,
+            requests_per_minute,
+            tokens_per_minute,
+        )
         if not GOOGLE_AVAILABLE:
             raise ImportError(
                 "google-generativeai package not installed. Run: pip install google-generativeai"
             )
+        import google.generativeai as genai
+
+        self.genai = genai
         genai.configure(api_key=api_key)
         self.model_instance = genai.GenerativeModel(model)
+        self.context_caching = True
+        self.cache_ttl = datetime.timedelta(minutes=10)
+        self._cached_contents: Dict[str, tuple[Any, float]] = {}
 
     def _convert_to_gemini_tools(self, tools: List[Dict[str, Any]]) -> List[Any]:
         """Convert OpenAI function format to Gemini tool format."""
@@ -40,98 +72,187 @@ class GoogleProvider(LLMProvider):
                 ),
             }
             function_declarations.append(func_decl)
-        return [genai.protos.Tool(function_declarations=function_declarations)]
+        return [self.genai.protos.Tool(function_declarations=function_declarations)]
+
+    async def _get_model(
+        self, system: str, tools: Optional[List[Dict[str, Any]]]
+    ) -> tuple[Any, Dict[str, Any]]:
+        """Get a model for the system prompt and tools, plus send_message kwargs."""
+        gemini_tools = self._convert_to_gemini_tools(tools) if tools else None
+
+        tools_json = dumps(tools or [])
+        if (len(system) + len(tools_json)) / 4 >= _MIN_CACHE_TOKENS:
+            model = await self._get_cached_model(system, tools_json, gemini_tools)
+            if model is not None:
+                return model, {}
+
+        if system:
+            model = self.genai.GenerativeModel(self.model, system_instruction=system)
+        else:
+            model = self.model_instance
+        return model, {"tools": gemini_tools} if gemini_tools else {}
+
+    async def _get_cached_model(self, system: str, tools_json: str, gemini_tools):
+        """
+        Get a model backed by a CachedContent holding the system prompt and tools.
 
-    def _convert_messages(
-        self, messages: List[Dict[str, Any]]
-    ) -> tuple[str, List[Any]]:
-        """Convert messages to Gemini format."""
-        system = ""
+        Compiled once per (system, tools) and reused; the TTL is extended when
+        more than half spent. Returns None if the model rejects context caching,
+        after which caching stays off for this provider.
+        """
+        if not self.context_caching:
+            return None
+
+        key = hashlib.sha256((system + tools_json).encode()).hexdigest()
+        now = time.monotonic()
+        ttl = self.cache_ttl.total_seconds()
+        entry = self._cached_contents.get(key)
+
+        try:
+            if entry is None or entry[1] <= now:
+                content = await asyncio.to_thread(
+                    self.genai.caching.CachedContent.create,
+                    model=self.model,
+                    system_instruction=system or None,
+                    tools=gemini_tools,
+                    ttl=self.cache_ttl,
+                )
+                self._cached_contents = {
+                    k: v for k, v in self._cached_contents.items() if v[1] > now
+                }
+                entry = self._cached_contents[key] = (content, now + ttl)
+            elif entry[1] - now < ttl / 2:
+                await asyncio.to_thread(entry[0].update, ttl=self.cache_ttl)
+                entry = self._cached_contents[key] = (entry[0], now + ttl)
+        except Exception as e:
+            logger.warning(f"Disabling Gemini context caching: {e}")
+            self.context_caching = False
+            return None
+
+        return self.genai.GenerativeModel.from_cached_content(entry[0])
+
+    def _convert_messages(self, messages: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Convert messages to Gemini history format.
+
+        Tool exchanges appended by chat_with_tool_result are already Gemini
+        contents (they carry "parts") and pass through unchanged.
+        """
         history = []
 
         for msg in messages:
-            if msg["role"] == "system":
-                system = msg["content"]
+            if "parts" in msg:
+                history.append(msg)
             elif msg["role"] == "user":
                 history.append({"role": "user", "parts": [msg["content"]]})
             elif msg["role"] == "assistant":
                 history.append({"role": "model", "parts": [msg["content"] or ""]})
 
-        return system, history
+        return history
+
+    def _parse_response(self, response) -> tuple[str, List[ToolCall]]:
+        """Extract all function calls, or the text if there are none."""
+        tool_calls = [
+            ToolCall(
+                name=part.function_call.name,
+                arguments=dict(part.function_call.args),
+            )
+            for part in response.parts
+            if hasattr(part, "function_call") and part.function_call
+        ]
+        if tool_calls:
+            return "", tool_calls
+        return response.text, []
+
+    async def _send(
+        self, chat, content, kwargs: Dict[str, Any], on_text: Optional[TextCallback]
+    ) -> tuple[str, List[ToolCall]]:
+        """Send a message, streaming text parts to on_text when given."""
+        await self._throttle(chat.history, content)
+        if on_text is None:
+            response = await chat.send_message_async(content, **kwargs)
+            return self._parse_response(response)
+
+        text_parts = []
+        tool_calls = []
+        response = await chat.send_message_async(content, stream=True, **kwargs)
+        async for chunk in response:
+            for part in chunk.parts:
+                if part.function_call:
+                    tool_calls.append(
+                        ToolCall(
+                            name=part.function_call.name,
+                            arguments=dict(part.function_call.args),
+                        )
+                    )
+                elif part.text:
+                    text_parts.append(part.text)
+                    await on_text(part.text)
+
+        if tool_calls:
+            return "", tool_calls
+        return "".join(text_parts), []
 
     async def chat(
         self,
+        system: str,
         messages: List[Dict[str, Any]],
         tools: Optional[List[Dict[str, Any]]] = None,
-    ) -> tuple[str, Optional[ToolCall]]:
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
         """Send chat to Gemini."""
-        system, history = self._convert_messages(messages)
+        history = self._convert_messages(messages)
 
-        if system:
-            model = genai.GenerativeModel(self.model, system_instruction=system)
-        else:
-            model = self.model_instance
+        model, kwargs = await self._get_model(system, tools)
 
         chat = model.start_chat(history=history[:-1] if len(history) > 1 else [])
 
         last_message = history[-1]["parts"][0] if history else ""
 
-        kwargs = {}
-        if tools:
-            kwargs["tools"] = self._convert_to_gemini_tools(tools)
-
-        response = await chat.send_message_async(last_message, **kwargs)
-
-        for part in response.parts:
-            if hasattr(part, "function_call") and part.function_call:
-                fc = part.function_call
-                tool_call = ToolCall(name=fc.name, arguments=dict(fc.args))
-                return "", tool_call
-
-        return response.text, None
+        return await self._send(chat, last_message, kwargs, on_text)
 
     async def chat_with_tool_result(
         self,
+        system: str,
         messages: List[Dict[str, Any]],
-        tool_call: ToolCall,
-        tool_result: Dict[str, Any],
+        tool_calls: List[ToolCall],
+        tool_results: List[Dict[str, Any]],
         tools: Optional[List[Dict[str, Any]]] = None,
-    ) -> tuple[str, Optional[ToolCall]]:
-        """Continue chat with tool result. Returns (text, optional_next_tool_call)."""
-        system, history = self._convert_messages(messages)
-
-        if system:
-            model = genai.GenerativeModel(self.model, system_instruction=system)
-        else:
-            model = self.model_instance
-
-        chat = model.start_chat(history=history[:-1] if len(history) > 1 else [])
-
-        last_message = history[-1]["parts"][0] if history else ""
-
-        kwargs = {}
-        if tools:
-            kwargs["tools"] = self._convert_to_gemini_tools(tools)
-
-        await chat.send_message_async(last_message, **kwargs)
-
-        response = await chat.send_message_async(
-            genai.protos.Content(
-                parts=[
-                    genai.protos.Part(
-                        function_response=genai.protos.FunctionResponse(
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
+        """Continue chat with tool results. Returns (text, next_tool_calls)."""
+        protos = self.genai.protos
+        messages.append(
+            {
+                "role": "model",
+                "parts": [
+                    protos.Part(
+                        function_call=protos.FunctionCall(
+                            name=tool_call.name, args=tool_call.arguments
+                        )
+                    )
+                    for tool_call in tool_calls
+                ],
+            }
+        )
+        messages.append(
+            {
+                "role": "user",
+                "parts": [
+                    protos.Part(
+                        function_response=protos.FunctionResponse(
                             name=tool_call.name, response={"result": tool_result}
                         )
                     )
-                ]
-            ),
-            **kwargs
+                    for tool_call, tool_result in zip(tool_calls, tool_results)
+                ],
+            }
         )
 
-        for part in response.parts:
-            if hasattr(part, "function_call") and part.function_call:
-                fc = part.function_call
-                next_tool_call = ToolCall(name=fc.name, arguments=dict(fc.args))
-                return "", next_tool_call
+        history = self._convert_messages(messages)
+
+        model, kwargs = await self._get_model(system, tools)
+
+        chat = model.start_chat(history=history[:-1])
 
-        return response.text, None
+        return await self._send(chat, history[-1], kwargs, on_text)
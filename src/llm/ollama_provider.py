@@ -2,29 +2,54 @@
 Ollama LLM provider implementation for local models.
 """
 
-import json
+import importlib.util
 from typing import List, Dict, Any, Optional
 from loguru import logger
 
-from src.llm.base import LLMProvider, ToolCall
+from src.llm.base import LLMProvider, TextCallback, ToolCall
+from src.utils.serialization import dumps, loads
 
-try:
-    import ollama
-    from ollama import AsyncClient
-
-    OLLAMA_AVAILABLE = True
-except ImportError:
-    OLLAMA_AVAILABLE = False
+OLLAMA_AVAILABLE = importlib.util.find_spec("ollama") is not None
 
 
 class OllamaProvider(LLMProvider):
     """Ollama local LLM provider."""
 
-    def __init__(self, api_key: str, model: str, base_url: Optional[str] = None):
-        super().__init__(api_key, model, base_url)
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        max_concurrent_requests: int = 20,
+        requests_per_minute: float = 0.0,
+        tokens_per_minute: float = 0.0,
+    ):
+        super().__init__(
+            api_key,
+            model,
+            base_url,
+            max_concurrent_requests,
+            requests_per_minute,
+            tokens_per_minute,
+        )
         if not OLLAMA_AVAILABLE:
             raise ImportError("ollama package not installed. Run: pip install ollama")
-        self.client = AsyncClient(host=base_url) if base_url else AsyncClient()
+        import httpx
+        from ollama import AsyncClient
+
+        self.client = AsyncClient(
+            host=base_url or None,
+            timeout=httpx.Timeout(None, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=50,
+                keepalive_expiry=300,
+            ),
+        )
+
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        await self.client.close()
 
     def _convert_to_ollama_tools(
         self, tools: List[Dict[str, Any]]
@@ -46,44 +71,86 @@ class OllamaProvider(LLMProvider):
             )
         return ollama_tools
 
-    async def chat(
+    def _parse_tool_calls(self, message: Dict[str, Any]) -> List[ToolCall]:
+        """Extract all tool calls from an Ollama response message."""
+        tool_calls = []
+        for tc in message.get("tool_calls") or []:
+            arguments = tc["function"]["arguments"]
+            tool_calls.append(
+                ToolCall(
+                    name=tc["function"]["name"],
+                    arguments=(
+                        arguments
+                        if isinstance(arguments, dict)
+                        else loads(arguments)
+                    ),
+                )
+            )
+        return tool_calls
+
+    async def _complete(
         self,
+        system: str,
         messages: List[Dict[str, Any]],
         tools: Optional[List[Dict[str, Any]]] = None,
-    ) -> tuple[str, Optional[ToolCall]]:
-        """Send chat to Ollama."""
-        kwargs = {"model": self.model, "messages": messages}
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
+        """Run a chat request with the system prompt prepended."""
+        full_messages = [{"role": "system", "content": system}] if system else []
+        full_messages.extend(messages)
+        await self._throttle(full_messages)
+
+        kwargs = {"model": self.model, "messages": full_messages}
 
         if tools:
             kwargs["tools"] = self._convert_to_ollama_tools(tools)
 
+        if on_text is not None:
+            return await self._stream(kwargs, on_text)
+
         response = await self.client.chat(**kwargs)
         message = response["message"]
 
-        if "tool_calls" in message and message["tool_calls"]:
-            tc = message["tool_calls"][0]
-            tool_call = ToolCall(
-                name=tc["function"]["name"],
-                arguments=(
-                    tc["function"]["arguments"]
-                    if isinstance(tc["function"]["arguments"], dict)
-                    else json.loads(tc["function"]["arguments"])
-                ),
-            )
-            return message.get("content", ""), tool_call
+        return message.get("content", ""), self._parse_tool_calls(message)
 
-        return message.get("content", ""), None
+    async def _stream(
+        self, kwargs: Dict[str, Any], on_text: TextCallback
+    ) -> tuple[str, List[ToolCall]]:
+        """Stream a chat response, passing text deltas to on_text as they arrive."""
+        text_parts = []
+        tool_calls = []
 
-    async def chat_with_tool_result(
+        async for part in await self.client.chat(**kwargs, stream=True):
+            message = part["message"]
+            content = message.get("content")
+            if content:
+                text_parts.append(content)
+                await on_text(content)
+            tool_calls.extend(self._parse_tool_calls(message))
+
+        return "".join(text_parts), tool_calls
+
+    async def chat(
         self,
+        system: str,
         messages: List[Dict[str, Any]],
-        tool_call: ToolCall,
-        tool_result: Dict[str, Any],
         tools: Optional[List[Dict[str, Any]]] = None,
-    ) -> tuple[str, Optional[ToolCall]]:
-        """Continue chat with tool result. Returns (text, optional_next_tool_call)."""
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
+        """Send chat to Ollama."""
+        return await self._complete(system, messages, tools, on_text)
 
-        full_messages = messages + [
+    async def chat_with_tool_result(
+        self,
+        system: str,
+        messages: List[Dict[str, Any]],
+        tool_calls: List[ToolCall],
+        tool_results: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
+        """Continue chat with tool results. Returns (text, next_tool_calls)."""
+        messages.append(
             {
                 "role": "assistant",
                 "content": "",
@@ -94,29 +161,13 @@ class OllamaProvider(LLMProvider):
                             "arguments": tool_call.arguments,
                         }
                     }
+                    for tool_call in tool_calls
                 ],
-            },
-            {"role": "tool", "content": json.dumps(tool_result)},
-        ]
-
-        kwargs = {"model": self.model, "messages": full_messages}
-
-        if tools:
-            kwargs["tools"] = self._convert_to_ollama_tools(tools)
-
-        response = await self.client.chat(**kwargs)
-        message = response["message"]
-
-        if "tool_calls" in message and message["tool_calls"]:
-            tc = message["tool_calls"][0]
-            next_tool_call = ToolCall(
-                name=tc["function"]["name"],
-                arguments=(
-                    tc["function"]["arguments"]
-                    if isinstance(tc["function"]["arguments"], dict)
-                    else json.loads(tc["function"]["arguments"])
-                ),
-            )
-            return message.get("content", ""), next_tool_call
-
-        return message.get("content", ""), None
+            }
+        )
+        messages.extend(
+            {"role": "tool", "content": dumps(tool_result)}
+            for tool_result in tool_results
+        )
+
+        return await self._complete(system, messages, tools, on_text)
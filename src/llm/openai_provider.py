@@ -2,71 +2,108 @@
 OpenAI LLM provider implementation.
 """
 
-import json
+import hashlib
+import importlib.util
 from typing import List, Dict, Any, Optional
-from openai import AsyncOpenAI
 from loguru import logger
 
-from src.llm.base import LLMProvider, ToolCall
+from src.llm.base import LLMProvider, TextCallback, ToolCall
+from src.utils.errors import llm_retry
+from src.utils.serialization import dumps, loads
+
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
 
 
 class OpenAIProvider(LLMProvider):
     """OpenAI API provider."""
 
-    def __init__(self, api_key: str, model: str, base_url: Optional[str] = None):
-        super().__init__(api_key, model, base_url)
-        self.client = AsyncOpenAI(
-            api_key=api_key, base_url=base_url if base_url else None
-        )
+    supports_batch = True
 
-    async def chat(
+    def __init__(
         self,
-        messages: List[Dict[str, Any]],
-        tools: Optional[List[Dict[str, Any]]] = None,
-    ) -> tuple[str, Optional[ToolCall]]:
-        """Send chat to OpenAI."""
-        kwargs = {"model": self.model, "messages": messages}
-
-        if tools:
-            kwargs["functions"] = tools
-            kwargs["function_call"] = "auto"
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        max_concurrent_requests: int = 20,
+        requests_per_minute: float = 0.0,
+        tokens_per_minute: float = 0.0,
+    ):
+        super().__init__(
+            api_key,
+            model,
+            base_url,
+            max_concurrent_requests,
+            requests_per_minute,
+            tokens_per_minute,
+        )
+        if not OPENAI_AVAILABLE:
+            raise ImportError("openai package not installed. Run: pip install openai")
+        import httpx
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        self.http_client = DefaultAsyncHttpxClient(
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=50,
+                keepalive_expiry=300,
+            ),
+        )
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url if base_url else None,
+            max_retries=0,
+            http_client=self.http_client,
+        )
 
-        response = await self.client.chat.completions.create(**kwargs)
-        message = response.choices[0].message
+    async def aclose(self):
+        """Close the pooled HTTP client."""
+        await self.http_client.aclose()
 
+    def _parse_message(self, message) -> tuple[str, List[ToolCall]]:
+        """Extract text and the function call, if any, from a response message."""
         if message.function_call:
             tool_call = ToolCall(
                 name=message.function_call.name,
-                arguments=json.loads(message.function_call.arguments),
+                arguments=loads(message.function_call.arguments),
             )
-            return message.content or "", tool_call
-
-        return message.content or "", None
-
-    async def chat_with_tool_result(
+            return message.content or "", [tool_call]
+
+        return message.content or "", []
+
+    def _prompt_cache_key(
+        self, system: str, tools: Optional[List[Dict[str, Any]]]
+    ) -> str:
+        """
+        Derive a stable prompt_cache_key from the system prompt and tools.
+
+        Requests sharing the key are routed together, so the repeated prefix
+        hits OpenAI's prompt cache more often.
+        """
+        key = system + dumps(tools or [])
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @llm_retry
+    async def _create(self, kwargs: Dict[str, Any], **options: Any):
+        """
+        Create a chat completion, retrying transient errors.
+
+        For streams only opening the stream is retried, so deltas already
+        passed to on_text are never sent twice.
+        """
+        await self._throttle(kwargs["messages"])
+        return await self.client.chat.completions.create(**kwargs, **options)
+
+    async def _complete(
         self,
+        system: str,
         messages: List[Dict[str, Any]],
-        tool_call: ToolCall,
-        tool_result: Dict[str, Any],
         tools: Optional[List[Dict[str, Any]]] = None,
-    ) -> tuple[str, Optional[ToolCall]]:
-        """Continue chat with tool result. Returns (text, optional_next_tool_call)."""
-
-        full_messages = messages + [
-            {
-                "role": "assistant",
-                "content": None,
-                "function_call": {
-                    "name": tool_call.name,
-                    "arguments": json.dumps(tool_call.arguments),
-                },
-            },
-            {
-                "role": "function",
-                "name": tool_call.name,
-                "content": json.dumps(tool_result),
-            },
-        ]
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
+        """Run a chat completion with the system prompt prepended."""
+        full_messages = [{"role": "system", "content": system}] if system else []
+        full_messages.extend(messages)
 
         kwargs = {"model": self.model, "messages": full_messages}
 
@@ -74,14 +111,135 @@ class OpenAIProvider(LLMProvider):
             kwargs["functions"] = tools
             kwargs["function_call"] = "auto"
 
-        response = await self.client.chat.completions.create(**kwargs)
-        message = response.choices[0].message
+        if system and not self.base_url:
+            # Sent as a body field: SDK releases before the parameter existed
+            # reject it as a keyword argument.
+            kwargs["extra_body"] = {
+                "prompt_cache_key": self._prompt_cache_key(system, tools)
+            }
+
+        if on_text is not None:
+            return await self._stream(kwargs, on_text)
+
+        response = await self._create(kwargs)
+        return self._parse_message(response.choices[0].message)
+
+    async def _stream(
+        self, kwargs: Dict[str, Any], on_text: TextCallback
+    ) -> tuple[str, List[ToolCall]]:
+        """Stream a completion, passing text deltas to on_text as they arrive."""
+        text_parts = []
+        function_name = ""
+        argument_parts = []
+
+        stream = await self._create(kwargs, stream=True)
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                text_parts.append(delta.content)
+                await on_text(delta.content)
+            if delta.function_call:
+                function_name += delta.function_call.name or ""
+                argument_parts.append(delta.function_call.arguments or "")
+
+        text = "".join(text_parts)
+        if function_name:
+            arguments = loads("".join(argument_parts) or "{}")
+            return text, [ToolCall(name=function_name, arguments=arguments)]
+        return text, []
 
-        if message.function_call:
-            next_tool_call = ToolCall(
-                name=message.function_call.name,
-                arguments=json.loads(message.function_call.arguments),
-            )
-            return message.content or "", next_tool_call
+    async def chat(
+        self,
+        system: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
+        """Send chat to OpenAI."""
+        return await self._complete(system, messages, tools, on_text)
 
-        return message.content or "", None
+    async def chat_with_tool_result(
+        self,
+        system: str,
+        messages: List[Dict[str, Any]],
+        tool_calls: List[ToolCall],
+        tool_results: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
+        """Continue chat with tool results. Returns (text, next_tool_calls)."""
+        for tool_call, tool_result in zip(tool_calls, tool_results):
+            messages += [
+                {
+                    "role": "assistant",
+                    "content": None,
+                    "function_call": {
+                        "name": tool_call.name,
+                        "arguments": dumps(tool_call.arguments),
+                    },
+                },
+                {
+                    "role": "function",
+                    "name": tool_call.name,
+                    "content": dumps(tool_result),
+                },
+            ]
+
+        return await self._complete(system, messages, tools, on_text)
+
+    async def submit_batch(self, system: str, prompts: List[str]) -> str:
+        """Upload prompts as a JSONL file and start a 24h Batch API job."""
+        system_messages = [{"role": "system", "content": system}] if system else []
+        lines = [
+            dumps(
+                {
+                    "custom_id": f"row_{i}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": self.model,
+                        "messages": system_messages
+                        + [{"role": "user", "content": prompt}],
+                    },
+                }
+            )
+            for i, prompt in enumerate(prompts)
+        ]
+        batch_file = await self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode()), purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        logger.info(f"Submitted OpenAI batch {batch.id} with {len(prompts)} requests")
+        return batch.id
+
+    async def poll_batch(self, job_id: str) -> Optional[List[Optional[str]]]:
+        """
+        Return batch results once the job has ended, else None.
+
+        Expired or cancelled jobs return whatever requests finished, with None
+        for the rest; a job that ended without any output raises.
+        """
+        batch = await self.client.batches.retrieve(job_id)
+        if batch.status in ("validating", "in_progress", "finalizing", "cancelling"):
+            return None
+
+        texts: List[Optional[str]] = [None] * batch.request_counts.total
+        if not batch.output_file_id:
+            if batch.status != "completed":
+                raise RuntimeError(f"Batch {job_id} ended with status {batch.status}")
+            return texts
+
+        output = await self.client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            item = loads(line)
+            response = item.get("response")
+            if response and response["status_code"] == 200:
+                index = int(item["custom_id"].removeprefix("row_"))
+                texts[index] = response["body"]["choices"][0]["message"]["content"]
+        return texts
@@ -0,0 +1,267 @@
+"""
+Semantic response cache for LLM providers.
+Answers near-duplicate user messages from a vector index instead of the API.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from src.llm.base import LLMProvider, LLMProviderWrapper, TextCallback, ToolCall
+from src.utils.serialization import dumps
+
+SEMANTIC_CACHE_AVAILABLE = all(
+    importlib.util.find_spec(name) is not None
+    for name in ("faiss", "numpy", "sentence_transformers")
+)
+
+_REDIS_SCHEMA = (
+    "SCHEMA ns TAG embedding VECTOR HNSW 6 "
+    "TYPE FLOAT32 DIM {dim} DISTANCE_METRIC COSINE"
+)
+
+
+class _Namespace:
+    """Vectors and cached responses for one (model, system, tools) combination."""
+
+    def __init__(self, index):
+        self.index = index
+        self.vectors = []
+        self.entries: List[tuple[float, str]] = []
+
+
+class SemanticCache:
+    """
+    Cosine-similarity cache of LLM text responses.
+
+    Messages are embedded with a sentence-transformers model and looked up in
+    a per-namespace faiss inner-product index over normalized vectors. Entries
+    older than `ttl` seconds never match and are evicted on the next insert,
+    as are the oldest entries once a namespace holds `max_entries`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        dim: int = 384,
+        ttl: float = 3600.0,
+        max_entries: int = 1000,
+        model_name: str = "all-MiniLM-L6-v2",
+    ):
+        if not SEMANTIC_CACHE_AVAILABLE:
+            raise ImportError(
+                "Semantic cache dependencies not installed. "
+                "Run: pip install faiss-cpu sentence-transformers"
+            )
+        import faiss
+        import numpy as np
+        from sentence_transformers import SentenceTransformer
+
+        self.faiss = faiss
+        self.np = np
+        self.encoder = SentenceTransformer(model_name)
+        self.threshold = threshold
+        self.dim = dim
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lock = threading.Lock()
+
+    def embed(self, text: str):
+        """Embed text as a normalized float32 row vector."""
+        vector = self.encoder.encode([text], normalize_embeddings=True)
+        return self.np.asarray(vector, dtype="float32")
+
+    def lookup(self, namespace: str, vector) -> Optional[str]:
+        """Return the cached response closest to vector if it clears the threshold."""
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None or not ns.entries:
+                return None
+            scores, ids = ns.index.search(vector, 1)
+            score, idx = float(scores[0][0]), int(ids[0][0])
+            if idx < 0 or score < self.threshold:
+                return None
+            created_at, text = ns.entries[idx]
+            if time.monotonic() - created_at > self.ttl:
+                return None
+            return text
+
+    def add(self, namespace: str, vector, text: str):
+        """Store a response under vector, evicting expired and excess entries."""
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None:
+                ns = _Namespace(self.faiss.IndexFlatIP(self.dim))
+                self._namespaces[namespace] = ns
+
+            now = time.monotonic()
+            keep = [
+                i
+                for i, (created_at, _) in enumerate(ns.entries)
+                if now - created_at <= self.ttl
+            ]
+            overflow = len(keep) - (self.max_entries - 1)
+            if overflow > 0:
+                keep = keep[overflow:]
+            if len(keep) < len(ns.entries):
+                ns.vectors = [ns.vectors[i] for i in keep]
+                ns.entries = [ns.entries[i] for i in keep]
+                ns.index.reset()
+                if ns.vectors:
+                    ns.index.add(self.np.vstack(ns.vectors))
+
+            ns.index.add(vector)
+            ns.vectors.append(vector)
+            ns.entries.append((now, text))
+
+
+class RedisSemanticCache(SemanticCache):
+    """
+    SemanticCache stored in a Redis Stack HNSW vector index.
+
+    Entries are shared by every bot process and survive restarts; Redis
+    expires them after `ttl` seconds. When Redis is unreachable, lookups and
+    inserts fall back to the in-process faiss index.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        threshold: float = 0.92,
+        dim: int = 384,
+        ttl: float = 86400.0,
+        max_entries: int = 1000,
+        model_name: str = "all-MiniLM-L6-v2",
+        index_name: str = "llm_cache",
+        key_prefix: str = "llm:cache:",
+    ):
+        if importlib.util.find_spec("redis") is None:
+            raise ImportError("redis package not installed. Run: pip install redis")
+        super().__init__(threshold, dim, ttl, max_entries, model_name)
+        import redis
+
+        self.redis_errors = redis.exceptions.RedisError
+        self.redis = redis.Redis.from_url(redis_url)
+        self.index_name = index_name
+        self.key_prefix = key_prefix
+        self._index_ready = False
+
+    def _ensure_index(self):
+        """Create the vector index on first use if it does not exist yet."""
+        if self._index_ready:
+            return
+        try:
+            args = ["FT.CREATE", self.index_name, "ON", "HASH", "PREFIX", "1"]
+            args += [self.key_prefix, *_REDIS_SCHEMA.format(dim=self.dim).split()]
+            self.redis.execute_command(*args)
+        except self.redis_errors as e:
+            if "already exists" not in str(e).lower():
+                raise
+        self._index_ready = True
+
+    def lookup(self, namespace: str, vector) -> Optional[str]:
+        """Return the closest cached response in Redis if it clears the threshold."""
+        try:
+            self._ensure_index()
+            query = f"(@ns:{{{namespace}}})=>[KNN 1 @embedding $vec AS score]"
+            args = ["FT.SEARCH", self.index_name, query, "PARAMS", "2", "vec"]
+            args += [vector.tobytes(), *"RETURN 2 response score DIALECT 2".split()]
+            result = self.redis.execute_command(*args)
+        except self.redis_errors as e:
+            logger.warning(f"Redis semantic cache unavailable, using memory: {e}")
+            return super().lookup(namespace, vector)
+
+        if not result or result[0] == 0:
+            return None
+        fields = dict(zip(result[2][::2], result[2][1::2]))
+        similarity = 1.0 - float(fields[b"score"])
+        if similarity < self.threshold:
+            return None
+        return fields[b"response"].decode()
+
+    def add(self, namespace: str, vector, text: str):
+        """Store a response in Redis with an expiry of `ttl` seconds."""
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        key = f"{self.key_prefix}{namespace}:{digest}"
+        try:
+            self._ensure_index()
+            pipe = self.redis.pipeline()
+            pipe.hset(
+                key,
+                mapping={
+                    "ns": namespace,
+                    "embedding": vector.tobytes(),
+                    "response": text,
+                },
+            )
+            pipe.expire(key, int(self.ttl))
+            pipe.execute()
+        except self.redis_errors as e:
+            logger.warning(f"Redis semantic cache unavailable, using memory: {e}")
+            super().add(namespace, vector, text)
+
+
+class CachedLLMProvider(LLMProviderWrapper):
+    """
+    Provider wrapper that serves chat() from a SemanticCache.
+
+    Only tool-enabled turns ending in a user message are cached, and only
+    responses without tool calls are stored, so sheet operations always reach
+    the model. The preceding turn is part of the namespace, so a short reply
+    like "yes" only matches answers given in the same context.
+    chat_with_tool_result() is passed through untouched.
+    """
+
+    def __init__(self, inner: LLMProvider, cache: SemanticCache):
+        super().__init__(inner)
+        self.cache = cache
+
+    def _namespace(
+        self,
+        system: str,
+        tools: Optional[List[Dict[str, Any]]],
+        previous: Optional[Dict[str, Any]],
+    ) -> str:
+        """Hash everything besides the user message that shapes the response."""
+        key = dumps([self.model, system, tools or [], previous])
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    async def chat(
+        self,
+        system: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        on_text: Optional[TextCallback] = None,
+    ) -> tuple[str, List[ToolCall]]:
+        """Answer from the cache when a similar message was seen, else the provider."""
+        last = messages[-1] if messages else None
+        if (
+            not tools
+            or last is None
+            or last.get("role") != "user"
+            or not isinstance(last.get("content"), str)
+        ):
+            return await self.inner.chat(system, messages, tools, on_text=on_text)
+
+        previous = messages[-2] if len(messages) > 1 else None
+        namespace = self._namespace(system, tools, previous)
+        vector = await asyncio.to_thread(self.cache.embed, last["content"])
+        cached = await asyncio.to_thread(self.cache.lookup, namespace, vector)
+        if cached is not None:
+            logger.debug("Semantic cache hit")
+            if on_text is not None:
+                await on_text(cached)
+            return cached, []
+
+        text, tool_calls = await self.inner.chat(
+            system, messages, tools, on_text=on_text
+        )
+        if text and not tool_calls:
+            await asyncio.to_thread(self.cache.add, namespace, vector, text)
+        return text, tool_calls
@@ -8,7 +8,7 @@ from loguru import logger
 
 from src.config.settings import settings
 from src.bot.telegram_bot import telegram_bot
-from src.sheets.sheets_client import sheets_client
+from src.sheets.sheets_client import get_sheets_client
 
 
 def check_llm_connection() -> bool:
@@ -28,6 +28,8 @@ def check_llm_connection() -> bool:
             api_key=settings.get_llm_api_key(),
             model=settings.get_llm_model(),
             base_url=settings.llm_base_url,
+            requests_per_minute=settings.llm_requests_per_minute,
+            tokens_per_minute=settings.llm_tokens_per_minute,
         )
 
         logger.info(
@@ -49,6 +51,7 @@ def check_sheets_connection() -> bool:
     try:
         logger.info("Checking Google Sheets connection...")
 
+        sheets_client = get_sheets_client()
         if sheets_client.health_check():
             logger.info(f"✓ Google Sheets connection successful")
             logger.info(f"  Service account: {sheets_client.service_account_email}")
@@ -0,0 +1,87 @@
+"""
+Async façade over the blocking Google Sheets client.
+Each call runs in a worker thread so gspread I/O never blocks the event loop.
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+
+from src.sheets.sheets_client import SheetsClient, get_sheets_client
+
+
+class AsyncSheetsClient:
+    """Awaitable wrappers for SheetsClient, with at most max_concurrency in flight."""
+
+    def __init__(self, client: Optional[SheetsClient] = None, max_concurrency: int = 5):
+        self._client = client
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @property
+    def client(self) -> SheetsClient:
+        """The wrapped client, defaulting to the shared one created on first use."""
+        if self._client is None:
+            self._client = get_sheets_client()
+        return self._client
+
+    async def _call(self, func, *args):
+        """Run a blocking client method in a worker thread."""
+        async with self._semaphore:
+            return await asyncio.to_thread(func, *args)
+
+    @property
+    def service_account_email(self) -> Optional[str]:
+        """Email of the service account sheets must be shared with."""
+        return self.client.service_account_email
+
+    def has_active_sheet(self) -> bool:
+        """Check, without API calls, whether a spreadsheet is open or configured."""
+        return self.client.has_active_sheet()
+
+    async def list_all_accessible_sheets(self) -> List[Dict]:
+        """List all spreadsheets shared with the service account."""
+        return await self._call(self.client.list_all_accessible_sheets)
+
+    async def open_sheet(self, url_or_id: str) -> Dict:
+        """Open a spreadsheet by URL or ID."""
+        return await self._call(self.client.open_sheet, url_or_id)
+
+    async def get_active_sheet_info(self) -> Optional[Dict]:
+        """Get info about currently active spreadsheet."""
+        return await self._call(self.client.get_active_sheet_info)
+
+    async def get_sheet_structure(self) -> Optional[Dict]:
+        """Get tab names and headers of the active spreadsheet."""
+        return await self._call(self.client.get_sheet_structure)
+
+    async def list_sheets(self) -> List[Dict]:
+        """List all worksheets in the active spreadsheet."""
+        return await self._call(self.client.list_sheets)
+
+    async def read_sheet(self, sheet_name: Optional[str] = None) -> Dict:
+        """Read all rows from a worksheet, including headers."""
+        return await self._call(self.client.read_sheet, sheet_name)
+
+    async def add_row(self, data: Dict[str, str], sheet_name: Optional[str] = None):
+        """Add a row to a worksheet."""
+        return await self._call(self.client.add_row, data, sheet_name)
+
+    async def update_cell(
+        self, row: int, column: str, value: str, sheet_name: Optional[str] = None
+    ):
+        """Update a cell."""
+        return await self._call(self.client.update_cell, row, column, value, sheet_name)
+
+    async def delete_row(self, row: int, sheet_name: Optional[str] = None):
+        """Delete a row."""
+        return await self._call(self.client.delete_row, row, sheet_name)
+
+    async def search(self, query: str) -> List[Dict]:
+        """Search across all worksheets in active spreadsheet."""
+        return await self._call(self.client.search, query)
+
+    async def health_check(self) -> bool:
+        """Check the Sheets connection."""
+        return await self._call(self.client.health_check)
+
+
+async_sheets_client = AsyncSheetsClient()
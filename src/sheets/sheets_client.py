@@ -3,14 +3,20 @@ Generic Google Sheets client with dynamic sheet access.
 """
 
 import re
-from typing import List, Dict, Optional
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Tuple
 import gspread
+from gspread.utils import absolute_range_name, numericise_all, to_records
 from google.oauth2.service_account import Credentials
 from loguru import logger
 
 from src.config.settings import settings
 from src.utils.errors import sheets_retry, SheetsConnectionError
 
+_SHEET_ID_RE = re.compile(r"/spreadsheets/d/([a-zA-Z0-9-_]+)")
+
 
 class SheetsClient:
     """Generic client for Google Sheets with dynamic sheet access."""
@@ -19,6 +25,12 @@ class SheetsClient:
         self.service_account_email = None
         self.spreadsheet = None
         self.client = self._auth()
+        self.header_ttl = 300.0
+        self._header_cache: Dict[
+            Tuple[str, str], Tuple[float, List[str], Dict[str, int]]
+        ] = {}
+        self.worksheets_ttl = 60.0
+        self._worksheet_lists: Dict[str, Tuple[float, List[gspread.Worksheet]]] = {}
 
     def _auth(self) -> gspread.Client:
         """Authenticate with Google Sheets."""
@@ -37,31 +49,110 @@ class SheetsClient:
 
     def _extract_sheet_id(self, url_or_id: str) -> str:
         """Extract sheet ID from URL or return as-is if already an ID."""
-
-        match = re.search(r"/spreadsheets/d/([a-zA-Z0-9-_]+)", url_or_id)
+        match = _SHEET_ID_RE.search(url_or_id)
         if match:
             return match.group(1)
         return url_or_id
 
     def _connect(self, sheet_id: Optional[str] = None):
-        """Connect to a spreadsheet."""
+        """Connect to a spreadsheet, keeping the open one if it is the target."""
         if sheet_id:
             target_id = self._extract_sheet_id(sheet_id)
-            self.spreadsheet = self.client.open_by_key(target_id)
-            logger.info(f"Connected to: {self.spreadsheet.title}")
         elif settings.google_sheet_id:
-            self.spreadsheet = self.client.open_by_key(settings.google_sheet_id)
-            logger.info(f"Connected to default: {self.spreadsheet.title}")
+            target_id = settings.google_sheet_id
         elif not self.spreadsheet:
             raise SheetsConnectionError("No sheet specified and no default configured")
+        else:
+            return
+
+        if self.spreadsheet is not None and self.spreadsheet.id == target_id:
+            return
+        self.spreadsheet = self.client.open_by_key(target_id)
+        if sheet_id:
+            logger.info(f"Connected to: {self.spreadsheet.title}")
+        else:
+            logger.info(f"Connected to default: {self.spreadsheet.title}")
 
-    def _get_sheet(self, name: Optional[str] = None):
-        """Get worksheet by name or first sheet."""
+    def _get_sheet(self, name: Optional[str] = None) -> gspread.Worksheet:
+        """Get worksheet by name or first sheet from the cached worksheet list."""
         if not self.spreadsheet:
             self._connect()
-        if name:
-            return self.spreadsheet.worksheet(name)
-        return self.spreadsheet.get_worksheet(0)
+        worksheets = self._list_worksheets()
+        if not name:
+            return worksheets[0]
+        for refresh in (False, True):
+            if refresh:
+                worksheets = self._list_worksheets(refresh=True)
+            for ws in worksheets:
+                if ws.title == name:
+                    return ws
+        raise gspread.exceptions.WorksheetNotFound(name)
+
+    @contextmanager
+    def _open_worksheet(self, name: Optional[str] = None):
+        """
+        Yield a worksheet, dropping its cached metadata if an API call fails.
+
+        A tab renamed or recreated elsewhere then resolves afresh when
+        sheets_retry tries again.
+        """
+        ws = self._get_sheet(name)
+        try:
+            yield ws
+        except gspread.exceptions.APIError:
+            self._invalidate_worksheets(ws)
+            self._invalidate_headers(ws)
+            raise
+
+    def _list_worksheets(self, refresh: bool = False) -> List[gspread.Worksheet]:
+        """List the active spreadsheet's worksheets, cached for `worksheets_ttl`."""
+        key = self.spreadsheet.id
+        now = time.monotonic()
+        cached = self._worksheet_lists.get(key)
+        if not refresh and cached and now - cached[0] < self.worksheets_ttl:
+            return cached[1]
+        worksheets = self.spreadsheet.worksheets()
+        self._worksheet_lists[key] = (now, worksheets)
+        return worksheets
+
+    def _invalidate_worksheets(self, ws):
+        """Drop the cached worksheet list of a worksheet's spreadsheet."""
+        self._worksheet_lists.pop(ws.spreadsheet_id, None)
+
+    def _header_map(
+        self, ws, refresh: bool = False
+    ) -> Tuple[List[str], Dict[str, int]]:
+        """
+        Get a worksheet's header row and a normalized-name to column index map.
+
+        Both are cached for `header_ttl` seconds; writes pass refresh=True so
+        columns inserted or reordered since are never written to by position.
+        The map uses lowercased, stripped names and keeps the first column for
+        duplicate headers.
+        """
+        cached = self._header_cache.get((ws.spreadsheet_id, ws.title))
+        if not refresh and cached and time.monotonic() - cached[0] < self.header_ttl:
+            return cached[1], cached[2]
+        return self._store_headers(ws, ws.row_values(1))
+
+    def _store_headers(
+        self, ws, headers: List[str]
+    ) -> Tuple[List[str], Dict[str, int]]:
+        """Cache a freshly read header row and build its column index map."""
+        lower_to_idx: Dict[str, int] = {}
+        for i, h in enumerate(headers):
+            lower_to_idx.setdefault(h.lower().strip(), i)
+        key = (ws.spreadsheet_id, ws.title)
+        self._header_cache[key] = (time.monotonic(), headers, lower_to_idx)
+        return headers, lower_to_idx
+
+    def _headers(self, ws) -> List[str]:
+        """Get a worksheet's header row, cached for `header_ttl` seconds."""
+        return self._header_map(ws)[0]
+
+    def _invalidate_headers(self, ws):
+        """Drop a worksheet's cached header row."""
+        self._header_cache.pop((ws.spreadsheet_id, ws.title), None)
 
     @sheets_retry
     def list_all_accessible_sheets(self) -> List[Dict]:
@@ -90,7 +181,7 @@ class SheetsClient:
                 "id": self.spreadsheet.id,
                 "title": self.spreadsheet.title,
                 "url": self.spreadsheet.url,
-                "worksheets": [ws.title for ws in self.spreadsheet.worksheets()],
+                "worksheets": [ws.title for ws in self._list_worksheets(refresh=True)],
                 "service_account": self.service_account_email,
             }
         except gspread.exceptions.SpreadsheetNotFound:
@@ -112,26 +203,30 @@ class SheetsClient:
             "id": self.spreadsheet.id,
             "title": self.spreadsheet.title,
             "url": self.spreadsheet.url,
-            "worksheets": [ws.title for ws in self.spreadsheet.worksheets()],
+            "worksheets": [ws.title for ws in self._list_worksheets()],
         }
 
+    def has_active_sheet(self) -> bool:
+        """Check, without API calls, whether a spreadsheet is open or configured."""
+        return self.spreadsheet is not None or bool(settings.google_sheet_id)
+
     def get_sheet_structure(self) -> Optional[Dict]:
         """Get lightweight structure: tab names and headers only (1 API call per tab)."""
+        if not self.has_active_sheet():
+            return None
         if not self.spreadsheet:
             try:
                 self._connect()
             except Exception:
                 return None
-        if not self.spreadsheet:
-            return None
 
         structure = {
             "title": self.spreadsheet.title,
             "tabs": {}
         }
-        for ws in self.spreadsheet.worksheets():
+        for ws in self._list_worksheets():
             try:
-                headers = ws.row_values(1)
+                headers = self._headers(ws)
                 if not headers:
                     continue
                 structure["tabs"][ws.title] = {
@@ -150,77 +245,115 @@ class SheetsClient:
             self._connect()
         return [
             {"name": ws.title, "rows": ws.row_count}
-            for ws in self.spreadsheet.worksheets()
+            for ws in self._list_worksheets()
         ]
 
     @sheets_retry
     def read_sheet(self, sheet_name: Optional[str] = None) -> Dict:
-        """Read all rows from a worksheet, including headers."""
-        ws = self._get_sheet(sheet_name)
-        headers = ws.row_values(1)
-        records = ws.get_all_records()
-        return {"headers": headers, "rows": records}
+        """Read all rows from a worksheet, with headers from the same fetch."""
+        with self._open_worksheet(sheet_name) as ws:
+            values = ws.get_values()
+            if not values or values == [[]]:
+                return {"headers": [], "rows": []}
+            headers = values[0]
+            self._store_headers(ws, headers)
+            rows = [numericise_all(row) for row in values[1:]]
+            return {"headers": headers, "rows": to_records(headers, rows)}
 
     @sheets_retry
     def add_row(self, data: Dict[str, str], sheet_name: Optional[str] = None):
         """Add a row to a worksheet. Maps data keys to sheet headers case-insensitively."""
-        ws = self._get_sheet(sheet_name)
-        headers = ws.row_values(1)
-        logger.debug(f"Sheet headers: {headers}")
-        logger.debug(f"Data to add: {data}")
+        with self._open_worksheet(sheet_name) as ws:
+            headers, lower_to_idx = self._header_map(ws, refresh=True)
+            logger.debug(f"Sheet headers: {headers}")
+            logger.debug(f"Data to add: {data}")
 
-        data_lower = {k.lower().strip(): v for k, v in data.items()}
-        row = [data_lower.get(h.lower().strip(), "") for h in headers]
+            row = [""] * len(headers)
+            for k, v in data.items():
+                i = lower_to_idx.get(k.lower().strip())
+                if i is not None:
+                    row[i] = v
 
-        if not any(row):
-            logger.warning(
-                f"Could not map data to headers. Headers: {headers}, Data keys: {list(data.keys())}"
-            )
-            return {"error": f"Could not map data. Sheet headers are: {headers}"}
+            if not any(row):
+                logger.warning(
+                    f"Could not map data to headers. Headers: {headers}, Data keys: {list(data.keys())}"
+                )
+                return {"error": f"Could not map data. Sheet headers are: {headers}"}
 
-        ws.append_row(row)
-        logger.info(f"Added row to {sheet_name or 'default'}: {row}")
-        return {"success": True, "row_added": row, "headers": headers}
+            ws.append_row(row)
+            self._invalidate_worksheets(ws)
+            logger.info(f"Added row to {sheet_name or 'default'}: {row}")
+            return {"success": True, "row_added": row, "headers": headers}
 
     @sheets_retry
     def update_cell(
         self, row: int, column: str, value: str, sheet_name: Optional[str] = None
     ):
         """Update a cell. Column matching is case-insensitive."""
-        ws = self._get_sheet(sheet_name)
-        headers = ws.row_values(1)
-        headers_lower = [h.lower().strip() for h in headers]
-        col_lower = column.lower().strip()
-        if col_lower not in headers_lower:
-            raise ValueError(f"Column '{column}' not found. Available: {headers}")
-        col_idx = headers_lower.index(col_lower) + 1
-        ws.update_cell(row + 1, col_idx, value)
-        logger.info(f"Updated [{row}, {headers[col_idx - 1]}] = {value}")
+        with self._open_worksheet(sheet_name) as ws:
+            headers, lower_to_idx = self._header_map(ws, refresh=True)
+            col_lower = column.lower().strip()
+            if col_lower not in lower_to_idx:
+                raise ValueError(f"Column '{column}' not found. Available: {headers}")
+            col_idx = lower_to_idx[col_lower] + 1
+            ws.update_cell(row + 1, col_idx, value)
+            if row == 0:
+                self._invalidate_headers(ws)
+            logger.info(f"Updated [{row}, {headers[col_idx - 1]}] = {value}")
 
     @sheets_retry
     def delete_row(self, row: int, sheet_name: Optional[str] = None):
         """Delete a row."""
-        ws = self._get_sheet(sheet_name)
-        ws.delete_rows(row + 1)
-        logger.info(f"Deleted row {row}")
+        with self._open_worksheet(sheet_name) as ws:
+            ws.delete_rows(row + 1)
+            self._invalidate_worksheets(ws)
+            if row == 0:
+                self._invalidate_headers(ws)
+            logger.info(f"Deleted row {row}")
 
     @sheets_retry
     def search(self, query: str) -> List[Dict]:
-        """Search across all worksheets in active spreadsheet."""
+        """Search across all worksheets in active spreadsheet with one batch read."""
         if not self.spreadsheet:
             self._connect()
+        worksheets = [
+            ws
+            for ws in self._list_worksheets()
+            if ws._properties.get("sheetType", "GRID") == "GRID"
+        ]
+        titles = [ws.title for ws in worksheets]
+        try:
+            response = self.spreadsheet.values_batch_get(
+                [absolute_range_name(title) for title in titles],
+                params={"fields": "valueRanges(values)"},
+            )
+            tables = [vr.get("values", []) for vr in response.get("valueRanges", [])]
+        except gspread.exceptions.APIError as e:
+            logger.debug(f"Batch read failed, searching tabs one by one: {e}")
+            tables = [self._read_values(ws) for ws in worksheets]
+
         results = []
         q = query.lower()
-        for ws in self.spreadsheet.worksheets():
-            try:
-                for idx, row in enumerate(ws.get_all_records(), 1):
-                    if any(q in str(v).lower() for v in row.values()):
-                        results.append({"sheet": ws.title, "row": idx, "data": row})
-            except Exception as e:
-                logger.debug(f"Skipping worksheet '{ws.title}' during search: {e}")
+        for title, values in zip(titles, tables):
+            if not values:
                 continue
+            headers = values[0]
+            for idx, row in enumerate(values[1:], 1):
+                if any(q in cell.lower() for cell in row):
+                    row = numericise_all(row + [""] * (len(headers) - len(row)))
+                    results.append(
+                        {"sheet": title, "row": idx, "data": dict(zip(headers, row))}
+                    )
         return results
 
+    def _read_values(self, ws) -> List[List[str]]:
+        """Read a worksheet's cell values, or none if the tab cannot be read."""
+        try:
+            return ws.get_values()
+        except Exception as e:
+            logger.debug(f"Skipping worksheet '{ws.title}' during search: {e}")
+            return []
+
     def health_check(self) -> bool:
         """Check connection using Sheets API only (no Drive API needed)."""
         try:
@@ -235,4 +368,16 @@ class SheetsClient:
             return False
 
 
-sheets_client = SheetsClient()
+_sheets_client: Optional[SheetsClient] = None
+_sheets_client_lock = threading.Lock()
+
+
+def get_sheets_client() -> SheetsClient:
+    """Get the shared SheetsClient, authenticating with Google on first use."""
+    global _sheets_client
+    if _sheets_client is None:
+        with _sheets_client_lock:
+            if _sheets_client is None:
+                _sheets_client = SheetsClient()
+    return _sheets_client
+
@@ -3,10 +3,15 @@ Custom exceptions and retry decorators for API calls.
 Uses tenacity for exponential backoff retry logic.
 """
 
+import importlib.util
+import sys
+
 from tenacity import (
+    RetryCallState,
     retry,
     stop_after_attempt,
     wait_exponential,
+    retry_if_exception,
     retry_if_exception_type,
 )
 import gspread.exceptions
@@ -36,31 +41,61 @@ class TelegramBotError(OpenSlothError):
     pass
 
 
-_llm_retry_exceptions = []
+_TRANSIENT_LLM_ERRORS = (
+    "RateLimitError",
+    "APIConnectionError",
+    "APITimeoutError",
+    "InternalServerError",
+)
 
-try:
-    from openai import RateLimitError, APIError
+_LLM_RETRY_EXCEPTIONS = {
+    "openai": _TRANSIENT_LLM_ERRORS,
+    "anthropic": _TRANSIENT_LLM_ERRORS,
+}
 
-    _llm_retry_exceptions.extend([RateLimitError, APIError])
-except ImportError:
-    pass
+_LLM_SDKS_INSTALLED = any(
+    importlib.util.find_spec(module) is not None for module in _LLM_RETRY_EXCEPTIONS
+)
 
-try:
-    from anthropic import RateLimitError as AnthropicRateLimitError
-    from anthropic import APIError as AnthropicAPIError
 
-    _llm_retry_exceptions.extend([AnthropicRateLimitError, AnthropicAPIError])
-except ImportError:
-    pass
+def _is_llm_retryable(exception: BaseException) -> bool:
+    """
+    Check an exception against the SDK error types without importing the SDKs.
+
+    Only rate limits, connection failures, timeouts and 5xx responses are
+    retried; other API errors such as 400 or 401 fail immediately. An SDK
+    that was never imported cannot have raised, so only modules already in
+    sys.modules are consulted.
+    """
+    if not _LLM_SDKS_INSTALLED:
+        return isinstance(exception, Exception)
+    for module_name, names in _LLM_RETRY_EXCEPTIONS.items():
+        module = sys.modules.get(module_name)
+        if module is not None and isinstance(
+            exception, tuple(getattr(module, name) for name in names)
+        ):
+            return True
+    return False
+
+
+_llm_backoff = wait_exponential(multiplier=1, min=2, max=10)
+
+
+def _wait_llm(retry_state: RetryCallState) -> float:
+    """Wait for a 429's retry-after header (at most 60s), else back off."""
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return min(float(headers.get("retry-after")), 60.0)
+    except (TypeError, ValueError):
+        return _llm_backoff(retry_state)
+
 
 llm_retry = retry(
-    retry=(
-        retry_if_exception_type(tuple(_llm_retry_exceptions))
-        if _llm_retry_exceptions
-        else retry_if_exception_type((Exception,))
-    ),
-    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception(_is_llm_retryable),
+    wait=_wait_llm,
     stop=stop_after_attempt(3),
+    reraise=True,
 )
 
 sheets_retry = retry(
@@ -0,0 +1,42 @@
+"""
+Async token-bucket rate limiter.
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Token bucket refilling at rate_per_sec up to capacity. Rate 0 disables it."""
+
+    def __init__(self, rate_per_sec: float, capacity: float):
+        self.rate = rate_per_sec
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """Add the tokens accrued since the last refill."""
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """
+        Wait until `tokens` are available, then take them. Waiters queue in order.
+
+        A request larger than capacity waits for a full bucket and takes it into
+        debt, so later callers wait until the excess has refilled.
+        """
+        if self.rate <= 0:
+            return
+        needed = min(tokens, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < needed:
+                await asyncio.sleep((needed - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
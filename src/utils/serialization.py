@@ -0,0 +1,24 @@
+"""
+JSON helpers for LLM payloads.
+Uses orjson when installed and falls back to the standard library json module.
+"""
+
+from typing import Any
+
+try:
+    import orjson
+
+    def dumps(obj: Any) -> str:
+        """Serialize obj to a compact JSON string."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    loads = orjson.loads
+
+except ImportError:
+    import json
+
+    def dumps(obj: Any) -> str:
+        """Serialize obj to a compact JSON string."""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    loads = json.loads